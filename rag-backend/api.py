@@ -5,6 +5,7 @@ FastAPI endpoints for query and ingest functionality.
 """
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel, Field
 from typing import Optional
@@ -21,18 +22,20 @@ from dotenv import load_dotenv
 load_dotenv("../.env")  # Root .env
 load_dotenv()  # Local .env (overrides)
 
-from jig import run_pipeline, map_pipeline
+from jig import run_pipeline
 from jig.core.types import LLMClient
 from jig.llm import AnthropicClient
 from jig.tracing import SQLiteTracer
 
 from loader import load_content, flatten_document
 from vectorstore import VectorStore
-from proposer import identify_related_summaries
-from pipelines import build_query_pipeline, build_proposal_pipeline
+from proposer import identify_related_summaries, is_parseable_proposal
+from pipelines import build_query_pipeline, build_proposal_pipeline, map_pipeline_concurrent
+from synthesizer import NO_DOCUMENTS_ANSWER, build_synthesis_prompt, stream_synthesis
 from writer import apply_update, preview_update, validate_proposal
 from diff_engine import Changelog, VersionCache, diff_and_log
 from jobs import JobStore, JobStatus
+from llm_cache import CachingLLMClient
 
 # Configure logging
 logging.basicConfig(
@@ -96,6 +99,29 @@ def create_llm_client(provider: str, model: str) -> LLMClient:
         raise ValueError(f"Unknown LLM provider: {provider}")
 
 
+def create_cached_llm_clients() -> tuple[CachingLLMClient, CachingLLMClient]:
+    """Create the (query, ingest) LLM clients from LLM_* env vars, each behind a cache."""
+    query_provider = os.getenv("LLM_QUERY_PROVIDER", "anthropic")
+    query_model = os.getenv("LLM_QUERY_MODEL", "claude-sonnet-4-20250514")
+    ingest_provider = os.getenv("LLM_INGEST_PROVIDER", "anthropic")
+    ingest_model = os.getenv("LLM_INGEST_MODEL", "claude-sonnet-4-20250514")
+
+    # Repeating a query over unchanged documents, or re-ingesting an
+    # unchanged entry, re-sends an identical prompt. Ingest only keeps
+    # responses that parse as proposals, so re-ingesting retries bad ones
+    query_llm = CachingLLMClient(
+        create_llm_client(query_provider, query_model), model=query_model
+    )
+    ingest_llm = CachingLLMClient(
+        create_llm_client(ingest_provider, ingest_model),
+        model=ingest_model,
+        validate=is_parseable_proposal,
+    )
+    logger.info(f"Query LLM: {query_provider}/{query_model}")
+    logger.info(f"Ingest LLM: {ingest_provider}/{ingest_model}")
+    return query_llm, ingest_llm
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan - initialize on startup."""
@@ -109,15 +135,7 @@ async def lifespan(app: FastAPI):
     vector_store = VectorStore(MEMORY_DB_PATH)
 
     # Initialize LLM clients (configurable per operation), tracer, and job store
-    query_provider = os.getenv("LLM_QUERY_PROVIDER", "anthropic")
-    query_model = os.getenv("LLM_QUERY_MODEL", "claude-sonnet-4-20250514")
-    ingest_provider = os.getenv("LLM_INGEST_PROVIDER", "anthropic")
-    ingest_model = os.getenv("LLM_INGEST_MODEL", "claude-sonnet-4-20250514")
-
-    app.state.query_llm = create_llm_client(query_provider, query_model)
-    app.state.ingest_llm = create_llm_client(ingest_provider, ingest_model)
-    logger.info(f"Query LLM: {query_provider}/{query_model}")
-    logger.info(f"Ingest LLM: {ingest_provider}/{ingest_model}")
+    app.state.query_llm, app.state.ingest_llm = create_cached_llm_clients()
 
     tracer_db = os.getenv("TRACER_DB_PATH", "jig_traces.db")
     app.state.tracer = SQLiteTracer(db_path=tracer_db)
@@ -219,6 +237,34 @@ async def query(request: QueryRequest):
     return {"job_id": job.id, "status": job.status.value}
 
 
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest):
+    """
+    Answer a query synchronously, streaming the answer text as it's generated.
+
+    The cited source IDs are known before generation starts and are sent in
+    the X-Sources header (comma-separated). Unlike POST /query, this is not
+    tracked as a job or traced.
+    """
+    if not vector_store:
+        raise HTTPException(status_code=503, detail="Vector store not initialized")
+
+    retrieved = await vector_store.query(request.query, request.n_results)
+    if not retrieved:
+        return StreamingResponse(
+            iter([NO_DOCUMENTS_ANSWER]),
+            media_type="text/plain; charset=utf-8",
+            headers={"X-Sources": ""},
+        )
+
+    prompt, source_ids = build_synthesis_prompt(request.query, retrieved)
+    return StreamingResponse(
+        stream_synthesis(prompt, app.state.query_llm),
+        media_type="text/plain; charset=utf-8",
+        headers={"X-Sources": ",".join(source_ids)},
+    )
+
+
 async def run_query_job(job_id: str, query_text: str, n_results: int):
     """Background task: run query pipeline and store result."""
     store = app.state.job_store
@@ -416,6 +462,8 @@ async def search(request: SearchRequest):
 
     retrieved = await vector_store.query(request.query, request.n_results, where)
     
+    # Plain dicts: response_model validates the payload once on the way out,
+    # so building SearchResult models here would validate every hit twice.
     results = []
     for doc in retrieved:
         metadata = doc.get("metadata", {})
@@ -423,46 +471,33 @@ async def search(request: SearchRequest):
         # Create snippet from first 200 chars
         snippet = content[:200] + "..." if len(content) > 200 else content
         
-        results.append(SearchResult(
-            id=doc["id"],
-            topic=metadata.get("topic", ""),
-            type=metadata.get("type", "entry"),
-            distance=doc.get("distance", 0),
-            snippet=snippet
-        ))
+        results.append({
+            "id": doc["id"],
+            "topic": metadata.get("topic", ""),
+            "type": metadata.get("type", "entry"),
+            "distance": doc.get("distance", 0),
+            "snippet": snippet,
+        })
     
-    return SearchResponse(results=results)
+    return {"results": results}
 
 
 # ============ Ingest Mode ============
 
-def load_entry_document(file_path: str, content_dir: str) -> tuple[str, dict, dict]:
+def _resolve_content_path(file_path: str, content_dir: str) -> str:
     """
-    Load and validate an entry document from a file path.
-    
-    This helper function consolidates the common logic used by both /ingest and /index endpoints:
-    - Path resolution (absolute/relative)
-    - Security validation (commonpath check)
-    - YAML file loading
-    - Document structure building
+    Resolve an entry path and make sure it stays inside the content directory.
     
     Args:
         file_path: Path to the entry file (absolute or relative to content_dir)
         content_dir: Root content directory path
     
     Returns:
-        Tuple of (abs_path, raw_entry, document)
-        - abs_path: Absolute path to the entry file
-        - raw_entry: Raw YAML data as loaded from file
-        - document: Structured document dict with id, content, metadata, and raw fields
+        Absolute path to the entry file
     
     Raises:
-        HTTPException: On validation errors, missing files, or YAML parse failures
+        HTTPException: 400 if the path escapes content_dir
     """
-    from ruamel.yaml import YAML
-    yaml_parser = YAML()
-    yaml_parser.preserve_quotes = True
-    
     # Security: ensure file is within content directory
     # Use commonpath to prevent prefix bypass (e.g., content-agn vs content-agn-backup)
     # If path is relative, resolve it against content_dir
@@ -485,6 +520,37 @@ def load_entry_document(file_path: str, content_dir: str) -> tuple[str, dict, di
             detail=f"File must be within content directory: {content_dir}"
         )
     
+    return abs_path
+
+
+def load_entry_document(file_path: str, content_dir: str) -> tuple[str, dict, dict]:
+    """
+    Load and validate an entry document from a file path.
+    
+    This helper function consolidates the common logic used by both /ingest and /index endpoints:
+    - Path resolution and security validation (see _resolve_content_path)
+    - YAML file loading
+    - Document structure building
+    
+    Args:
+        file_path: Path to the entry file (absolute or relative to content_dir)
+        content_dir: Root content directory path
+    
+    Returns:
+        Tuple of (abs_path, raw_entry, document)
+        - abs_path: Absolute path to the entry file
+        - raw_entry: Raw YAML data as loaded from file
+        - document: Structured document dict with id, content, metadata, and raw fields
+    
+    Raises:
+        HTTPException: On validation errors, missing files, or YAML parse failures
+    """
+    from ruamel.yaml import YAML
+    yaml_parser = YAML()
+    yaml_parser.preserve_quotes = True
+    
+    abs_path = _resolve_content_path(file_path, content_dir)
+    
     if not os.path.exists(abs_path):
         raise HTTPException(status_code=404, detail="Entry file not found")
     
@@ -627,7 +693,7 @@ async def run_ingest_job(job_id: str, file_path: str, max_proposals: int | None)
             )
             return
 
-        # Generate proposals (parallel via map_pipeline)
+        # Generate proposals (one concurrent LLM call per summary)
         n = len(related)
         store.update(
             job_id,
@@ -635,7 +701,7 @@ async def run_ingest_job(job_id: str, file_path: str, max_proposals: int | None)
         )
 
         proposal_pipeline = build_proposal_pipeline(app.state.tracer)
-        map_result = await map_pipeline(
+        map_result = await map_pipeline_concurrent(
             proposal_pipeline,
             items=[{"entry": entry, "summary": s} for s in related],
             context={"llm": app.state.ingest_llm},
@@ -719,13 +785,13 @@ async def approve(request: ApproveRequest):
     # Validate
     is_valid, error = validate_proposal(proposal_dict)
     if not is_valid:
-        return ApproveResponse(success=False, error=error)
+        return {"success": False, "error": error}
 
     # Apply update
     result = apply_update(proposal_dict, CONTENT_DIR)
 
     if not result.get("success"):
-        return ApproveResponse(success=False, error=result.get("error"))
+        return {"success": False, "error": result.get("error")}
 
     # Re-index the updated summary and log changes
     documents = load_content(CONTENT_DIR)
@@ -740,11 +806,12 @@ async def approve(request: ApproveRequest):
             if file_path:
                 diff_and_log(file_path, updated[0]["raw"], changelog, version_cache)
     
-    return ApproveResponse(
-        success=True,
-        file=result.get("file"),
-        changes=result.get("changes", [])
-    )
+    # Returned as a dict so response_model is the only validation pass
+    return {
+        "success": True,
+        "file": result.get("file"),
+        "changes": result.get("changes", []),
+    }
 
 
 class PreviewRequest(BaseModel):
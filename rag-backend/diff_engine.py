@@ -7,11 +7,15 @@ Compares document versions and generates structured change sets.
 
 import json
 import logging
+import re
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 from ruamel.yaml import YAML
 
+from jsonutil import dumps_line as _dumps_line, loads as _loads
+
 logger = logging.getLogger(__name__)
 
 yaml = YAML()
@@ -36,27 +40,39 @@ def flatten_to_nodes(data: Any, path: str = "") -> dict[str, Any]:
     """
     nodes = {}
     
-    if isinstance(data, dict):
-        for key, value in data.items():
-            new_path = f"{path}.{key}" if path else key
-            if isinstance(value, (dict, list)) and value:
-                nodes.update(flatten_to_nodes(value, new_path))
-            else:
-                nodes[new_path] = value
-    elif isinstance(data, list):
-        for i, item in enumerate(data):
-            new_path = f"{path}[{i}]"
-            if isinstance(item, (dict, list)) and item:
-                nodes.update(flatten_to_nodes(item, new_path))
-            else:
-                nodes[new_path] = item
-    else:
+    if not isinstance(data, (dict, list)):
         if path:
             nodes[path] = data
+        return nodes
+    
+    # Iterative walk over a stack of (children iterator, prefix, is_dict).
+    # Every leaf lands directly in one output dict (no per-level dicts or
+    # nodes.update() copies) and deep documents can't hit the recursion
+    # limit. Descending into a child suspends the parent's iterator, so
+    # paths still come out in document order.
+    stack = [(_iter_children(data), path, isinstance(data, dict))]
+    while stack:
+        children, prefix, is_dict = stack[-1]
+        for key, value in children:
+            if is_dict:
+                new_path = f"{prefix}.{key}" if prefix else key
+            else:
+                new_path = f"{prefix}[{key}]"
+            if isinstance(value, (dict, list)) and value:
+                stack.append((_iter_children(value), new_path, isinstance(value, dict)))
+                break
+            nodes[new_path] = value
+        else:
+            stack.pop()
     
     return nodes
 
 
+def _iter_children(container: dict | list):
+    """(key, value) pairs of a dict, or (index, item) pairs of a list."""
+    return iter(container.items()) if isinstance(container, dict) else enumerate(container)
+
+
 def get_node_value(data: Any, path: str) -> tuple[bool, Any]:
     """
     Get a value at a specific path in nested data.
@@ -87,8 +103,26 @@ def get_node_value(data: Any, path: str) -> tuple[bool, Any]:
     return True, current
 
 
-def _parse_path(path: str) -> list[str | int]:
-    """Parse a path string into components."""
+# A well-formed path is dot-separated keys, each followed by zero or more
+# [N] indexes; anything else goes through the char-by-char parser, which
+# tolerates stray dots and reports malformed indexes.
+_WELL_FORMED_PATH_RE = re.compile(r"[^.\[\]]+(?:\[\d+\])*(?:\.[^.\[\]]+(?:\[\d+\])*)*")
+_PATH_PART_RE = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+@lru_cache(maxsize=4096)
+def _parse_path(path: str) -> tuple[str | int, ...]:
+    """Parse a path string into components (cached; paths repeat across diffs)."""
+    if _WELL_FORMED_PATH_RE.fullmatch(path):
+        return tuple(
+            int(index) if index else key
+            for key, index in _PATH_PART_RE.findall(path)
+        )
+    return tuple(_parse_path_slow(path))
+
+
+def _parse_path_slow(path: str) -> list[str | int]:
+    """Parse any path string into components, raising on malformed indexes."""
     parts = []
     current = ""
     i = 0
@@ -155,6 +189,11 @@ def compute_diff(
     Returns:
         List of change objects
     """
+    # Re-saving an unchanged file is the common case; one == walk (which
+    # stops at the first mismatch) beats flattening both versions.
+    if old_data == new_data:
+        return []
+    
     if timestamp is None:
         timestamp = datetime.now(timezone.utc)
     
@@ -245,9 +284,13 @@ class Changelog:
         Returns:
             Number of changes written
         """
-        with open(self.path, "a") as f:
-            for change in changes:
-                f.write(json.dumps(change, ensure_ascii=False) + "\n")
+        # Serialize the whole batch up front and hand it to one write()
+        payload = b"".join(_dumps_line(change) for change in changes)
+        # Opened per call, so a rotated or replaced changelog gets the
+        # batch instead of an unlinked inode; buffered write() retries
+        # short writes until the whole payload is out
+        with open(self.path, "ab") as f:
+            f.write(payload)
         
         logger.info(f"Appended {len(changes)} changes to changelog")
         return len(changes)
@@ -264,12 +307,12 @@ class Changelog:
         if not self.path.exists():
             return changes
         
-        with open(self.path, "r") as f:
+        with open(self.path, "r", encoding="utf-8") as f:
             for line in f:
                 line = line.strip()
                 if line:
                     try:
-                        changes.append(json.loads(line))
+                        changes.append(_loads(line))
                     except json.JSONDecodeError as e:
                         logger.warning(f"Invalid JSON in changelog: {e}")
         
@@ -305,12 +348,13 @@ class Changelog:
         filtered.sort(key=lambda c: c.get("timestamp", ""), reverse=True)
         return filtered
     
-    def read_by_path(self, path: str) -> list[dict]:
+    def read_by_path(self, path: str | tuple[str, ...]) -> list[dict]:
         """
         Read all changes for a specific node path.
         
         Args:
-            path: Node path (e.g., "zkSNARKs.tradeoffs")
+            path: Node path prefix (e.g., "zkSNARKs.tradeoffs"), or a tuple
+                of prefixes to match any of in one pass
             
         Returns:
             List of changes for that path, newest first
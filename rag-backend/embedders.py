@@ -11,6 +11,12 @@ Precedence (highest wins):
   USE_LOCAL_EMBEDDINGS=true   -> sentence-transformers all-MiniLM-L6-v2
   OPENAI_API_KEY looks real   -> OpenAI text-embedding-3-small (1536-dim)
   fallback                    -> sentence-transformers all-MiniLM-L6-v2
+
+Backends that can embed many texts in one call also expose an
+`embed_many` attribute (async `list[str] -> list[np.ndarray]`), which
+VectorStore uses to embed a whole indexing batch up front. The OpenAI
+and sentence-transformers backends also carry a `model_name`, which
+`disk_cached_embedder` uses to key a persistent embedding cache.
 """
 
 from __future__ import annotations
@@ -19,6 +25,9 @@ import asyncio
 import hashlib
 import logging
 import os
+import sqlite3
+import threading
+from functools import lru_cache
 from typing import Awaitable, Callable
 
 import numpy as np
@@ -29,17 +38,38 @@ logger = logging.getLogger(__name__)
 # this shape. Matches `jig.memory.local.Embedder`.
 Embedder = Callable[[str], Awaitable[np.ndarray]]
 
+# Inputs per OpenAI embeddings request. Chunks run up to ~1500 tokens, so
+# this stays well inside the per-request token cap.
+OPENAI_BATCH_SIZE = 64
+# Embedding requests in flight at once from one embed_many call
+OPENAI_MAX_CONCURRENCY = 4
+
+# Held while a sentence-transformers model loads; lru_cache alone would let
+# two threads that miss at the same time each load a copy
+_model_load_lock = threading.Lock()
+
 
 def mock_embedder(dim: int = 384) -> Embedder:
     """Deterministic sha256-seeded embeddings — no network, same value
     for the same input across runs. Useful for tests and cold CI."""
+    multipliers = np.arange(1, dim + 1, dtype=np.int64)
 
-    async def embed(text: str) -> np.ndarray:
+    def seed(text: str) -> int:
         sha = hashlib.sha256(text.encode("utf-8")).digest()
-        seed_val = int.from_bytes(sha[:8], "big")
-        values = [((seed_val * (i + 1)) % 10000) / 5000.0 - 1.0 for i in range(dim)]
-        return np.array(values, dtype=np.float32)
+        # Reduce the 64-bit seed first so the product fits in int64;
+        # (seed * k) % m == ((seed % m) * k) % m
+        return int.from_bytes(sha[:8], "big") % 10000
 
+    async def embed(text: str) -> np.ndarray:
+        values = (seed(text) * multipliers) % 10000 / 5000.0 - 1.0
+        return values.astype(np.float32)
+
+    async def embed_many(texts: list[str]) -> list[np.ndarray]:
+        seeds = np.array([seed(t) for t in texts], dtype=np.int64)
+        values = (seeds[:, None] * multipliers) % 10000 / 5000.0 - 1.0
+        return list(values.astype(np.float32))
+
+    embed.embed_many = embed_many
     return embed
 
 
@@ -56,17 +86,41 @@ def openai_embedder(
         resp = await client.embeddings.create(model=model, input=text)
         return np.array(resp.data[0].embedding, dtype=np.float32)
 
+    async def embed_many(texts: list[str]) -> list[np.ndarray]:
+        semaphore = asyncio.Semaphore(OPENAI_MAX_CONCURRENCY)
+
+        async def embed_batch(batch: list[str]) -> list[np.ndarray]:
+            async with semaphore:
+                resp = await client.embeddings.create(model=model, input=batch)
+            return [np.array(d.embedding, dtype=np.float32) for d in resp.data]
+
+        batches = await asyncio.gather(*(
+            embed_batch(texts[start:start + OPENAI_BATCH_SIZE])
+            for start in range(0, len(texts), OPENAI_BATCH_SIZE)
+        ))
+        return [vec for batch in batches for vec in batch]
+
+    embed.embed_many = embed_many
+    embed.model_name = model
     return embed
 
 
 def sentence_transformer_embedder(
     model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
 ) -> Embedder:
-    """Local sentence-transformers embeddings. The model is loaded when
-    `sentence_transformer_embedder()` is called (not at import), and
-    `encode` is pushed to a thread because the underlying `model.encode`
-    is blocking. `select_embedder` calls this once per process during
-    lifespan startup, so the model is instantiated once in practice."""
+    """Local sentence-transformers embeddings. The model is loaded on the
+    first `sentence_transformer_embedder()` call for a given model name
+    (not at import) and the embedder is reused by later calls, so every
+    `VectorStore` in the process shares one loaded model. Concurrent first
+    calls from several threads wait for a single load. `encode` is
+    pushed to a thread because the underlying `model.encode` is
+    blocking."""
+    with _model_load_lock:
+        return _sentence_transformer_embedder(model_name)
+
+
+@lru_cache(maxsize=None)
+def _sentence_transformer_embedder(model_name: str) -> Embedder:
     from sentence_transformers import SentenceTransformer
 
     model = SentenceTransformer(model_name)
@@ -75,9 +129,80 @@ def sentence_transformer_embedder(
         vec = await asyncio.to_thread(model.encode, text, convert_to_numpy=True)
         return vec.astype(np.float32)
 
+    async def embed_many(texts: list[str]) -> list[np.ndarray]:
+        vecs = await asyncio.to_thread(
+            model.encode, texts, batch_size=64, convert_to_numpy=True
+        )
+        return list(vecs.astype(np.float32))
+
+    embed.embed_many = embed_many
+    embed.model_name = model_name
     return embed
 
 
+def disk_cached_embedder(embed: Embedder, db_path: str, model_name: str) -> Embedder:
+    """Wrap `embed` with a sqlite-backed cache of its vectors.
+
+    Keys are sha256(model_name, text), so re-indexing unchanged content
+    (and restarting the server) skips the model or API call entirely.
+    Lookups are single-row sqlite reads on a local file, cheap enough to
+    run inline on the event loop. Call `embed.close()` on shutdown.
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB)")
+    conn.commit()
+    inner_many = getattr(embed, "embed_many", None)
+
+    def key(text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def lookup(keys: list[str]) -> dict[str, np.ndarray]:
+        found: dict[str, np.ndarray] = {}
+        for start in range(0, len(keys), 500):  # stay under sqlite's bound-parameter limit
+            batch = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            )
+            found.update((k, np.frombuffer(v, dtype=np.float32).copy()) for k, v in rows)
+        return found
+
+    def store(items: list[tuple[str, np.ndarray]]) -> None:
+        conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+            [(k, np.asarray(v, dtype=np.float32).tobytes()) for k, v in items],
+        )
+        conn.commit()
+
+    async def cached_embed(text: str) -> np.ndarray:
+        k = key(text)
+        found = lookup([k])
+        if k in found:
+            return found[k]
+        vec = await embed(text)
+        store([(k, vec)])
+        return vec
+
+    async def cached_embed_many(texts: list[str]) -> list[np.ndarray]:
+        keys = [key(t) for t in texts]
+        found = lookup(list(dict.fromkeys(keys)))
+        missing = list(dict.fromkeys(t for t, k in zip(texts, keys) if k not in found))
+        if missing:
+            if inner_many is not None:
+                vecs = await inner_many(missing)
+            else:
+                vecs = await asyncio.gather(*(embed(t) for t in missing))
+            new = [(key(t), v) for t, v in zip(missing, vecs)]
+            store(new)
+            found.update(new)
+        return [found[k] for k in keys]
+
+    cached_embed.embed_many = cached_embed_many
+    cached_embed.model_name = model_name
+    cached_embed.close = conn.close
+    return cached_embed
+
+
 def _looks_like_real_openai_key(key: str) -> bool:
     """Same heuristic as the pre-migration `get_embedding_function`:
     reject empty, placeholder ('sk-...'), and test ('test*') keys."""
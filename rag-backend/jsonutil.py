@@ -0,0 +1,64 @@
+"""
+Algerknown RAG - JSON Helpers
+
+orjson-backed JSON encoding and decoding with stdlib json fallbacks.
+orjson is an optional speedup, but it doesn't accept everything stdlib json
+does: it writes NaN/Infinity as null, rejects integers wider than 64 bits
+on encode, reads them back as floats, and can't parse NaN/Infinity at all.
+Those values take the stdlib path so they round-trip unchanged.
+"""
+
+import json
+import math
+import re
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is the fallback
+    orjson = None
+
+# Digit runs long enough to be an integer wider than 64 bits, which orjson
+# would parse as a float (str and bytes input)
+_LONG_DIGITS_RE = re.compile(r"[0-9]{19}")
+_LONG_DIGITS_BYTES_RE = re.compile(rb"[0-9]{19}")
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialize obj as one UTF-8 JSON line (trailing newline included)."""
+    if orjson is not None and _finite(obj):
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            # orjson.JSONEncodeError: ints wider than 64 bits, and some
+            # scalar subclasses (e.g. ruamel's ScalarFloat)
+            pass
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse JSON text.
+
+    Raises:
+        json.JSONDecodeError: If data isn't valid JSON.
+    """
+    long_digits = _LONG_DIGITS_RE if isinstance(data, str) else _LONG_DIGITS_BYTES_RE
+    if orjson is not None and not long_digits.search(data):
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # NaN/Infinity literals; json.loads accepts them, and raises
+            # the same error type for text that isn't JSON at all
+            pass
+    return json.loads(data)
+
+
+def _finite(obj: Any) -> bool:
+    """False if obj holds a NaN or infinite float, which orjson writes as null."""
+    if isinstance(obj, float):
+        return math.isfinite(obj)
+    if isinstance(obj, dict):
+        return all(_finite(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return all(_finite(item) for item in obj)
+    return True
@@ -0,0 +1,120 @@
+"""
+Algerknown RAG - LLM Response Cache
+
+In-memory LRU cache of LLM completions, keyed on model + prompt.
+Entries are ephemeral (TTL-expired) — not designed to survive restarts.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Optional
+
+from jig import CompletionParams, LLMClient, LLMResponse
+
+logger = logging.getLogger(__name__)
+
+# Defaults (configurable via LLM_CACHE_SIZE / LLM_CACHE_TTL env vars)
+DEFAULT_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+DEFAULT_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Stop reasons of a completion that ran to its natural end (Anthropic,
+# OpenAI); anything else, e.g. "max_tokens", means truncated output
+_FINISHED_STOP_REASONS = frozenset({"end_turn", "stop", "stop_sequence"})
+
+
+def _is_finished(response: LLMResponse) -> bool:
+    """False for completions the provider reports as cut short.
+
+    Responses from jig clients that don't report a stop reason count as
+    finished.
+    """
+    stop_reason = getattr(response, "stop_reason", None)
+    return stop_reason is None or stop_reason in _FINISHED_STOP_REASONS
+
+
+def cache_key(model: str, params: CompletionParams) -> str:
+    """SHA-256 over everything that determines a completion.
+
+    Prompts embed the full text of every document they cite, so editing
+    any of those documents changes the key.
+    """
+    payload = {
+        "model": model,
+        "system": params.system,
+        "messages": [(m.role.value, m.content) for m in params.messages],
+        "temperature": params.temperature,
+        "max_tokens": params.max_tokens,
+        "provider_params": params.provider_params,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CachingLLMClient(LLMClient):
+    """LLMClient wrapper that serves repeated prompts from an LRU cache.
+
+    Only finished completions are stored: errors propagate uncached, and
+    truncated responses (or, given `validate`, ones whose content it
+    rejects) are returned without being stored, so a retry asks again.
+    Tool-calling requests and streams bypass the cache.
+    """
+
+    def __init__(
+        self,
+        client: LLMClient,
+        model: str,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl_seconds: int = DEFAULT_CACHE_TTL,
+        validate: Optional[Callable[[str], bool]] = None,
+    ):
+        self._client = client
+        self._model = model
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._validate = validate
+        self._entries: OrderedDict[str, tuple[float, LLMResponse]] = OrderedDict()
+
+    @property
+    def client(self) -> LLMClient:
+        """The wrapped client that cache misses are sent to."""
+        return self._client
+
+    async def complete(self, params: CompletionParams) -> LLMResponse:
+        if params.tools or self._maxsize <= 0:
+            return await self._client.complete(params)
+
+        key = cache_key(self._model, params)
+        cached = self._entries.get(key)
+        if cached is not None:
+            stored_at, response = cached
+            if time.time() - stored_at < self._ttl:
+                self._entries.move_to_end(key)
+                logger.debug(f"LLM cache hit: {key[:12]}")
+                return response
+            del self._entries[key]
+
+        response = await self._client.complete(params)
+        if not _is_finished(response) or (
+            self._validate is not None and not self._validate(response.content)
+        ):
+            logger.debug(f"LLM response not cached: {key[:12]}")
+            return response
+        self._entries[key] = (time.time(), response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+        return response
+
+    async def stream(self, params: CompletionParams) -> AsyncIterator[str]:
+        async for text in self._client.stream(params):
+            yield text
+
+    def clear(self) -> None:
+        """Drop all cached completions."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -5,15 +5,80 @@ Parses YAML files (entries and summaries) into documents for embedding.
 Handles both entry and summary schemas with unified flattening.
 """
 
-from ruamel.yaml import YAML
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 import logging
+import os
+import re
+
+import yaml
+
+try:
+    from yaml import CSafeLoader as _BaseLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _BaseLoader
 
 logger = logging.getLogger(__name__)
 
-yaml = YAML()
-yaml.preserve_quotes = True
+
+class _Loader(_BaseLoader):
+    """libyaml-backed safe loader with YAML 1.2 core-schema scalars.
+
+    Loading is read-only (writer.py round-trips through ruamel when files
+    are edited), so the C parser is safe to use here. PyYAML otherwise
+    follows YAML 1.1 and would read unquoted yes/no/on/off as booleans,
+    10:30 as a base-60 int, 0777 as octal and 1_000 as a number, where
+    ruamel (YAML 1.2) and the content authors see strings and decimals.
+    """
+
+    def construct_yaml_int(self, node):
+        value = self.construct_scalar(node)
+        if value[:2] in ("0o", "0x"):
+            return int(value[2:], 8 if value[1] == "o" else 16)
+        return int(value)
+
+
+_YAML_1_1_SCALAR_TAGS = {
+    "tag:yaml.org,2002:bool",
+    "tag:yaml.org,2002:int",
+    "tag:yaml.org,2002:float",
+}
+_Loader.yaml_implicit_resolvers = {
+    first: [r for r in resolvers if r[0] not in _YAML_1_1_SCALAR_TAGS]
+    for first, resolvers in _BaseLoader.yaml_implicit_resolvers.items()
+}
+_Loader.add_implicit_resolver(
+    "tag:yaml.org,2002:bool",
+    re.compile(r"^(?:true|True|TRUE|false|False|FALSE)$"),
+    list("tTfF"),
+)
+# Registered before float, which would otherwise match plain digits too
+_Loader.add_implicit_resolver(
+    "tag:yaml.org,2002:int",
+    re.compile(r"^(?:[-+]?[0-9]+|0o[0-7]+|0x[0-9a-fA-F]+)$"),
+    list("-+0123456789"),
+)
+_Loader.add_implicit_resolver(
+    "tag:yaml.org,2002:float",
+    re.compile(
+        r"""^(?:[-+]?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?)(?:[eE][-+]?[0-9]+)?
+        |[-+]?\.(?:inf|Inf|INF)
+        |\.(?:nan|NaN|NAN))$""",
+        re.X,
+    ),
+    list("-+0123456789."),
+)
+_Loader.add_constructor("tag:yaml.org,2002:int", _Loader.construct_yaml_int)
+
+
+def parse_yaml(source):
+    """Parse a YAML string or stream into plain dicts/lists/scalars."""
+    return yaml.load(source, Loader=_Loader)
+
+
+# Below this many files the thread pool's startup costs more than it saves
+_PARALLEL_LOAD_MIN_FILES = 4
 
 
 def load_content(directory: str) -> list[dict]:
@@ -26,8 +91,8 @@ def load_content(directory: str) -> list[dict]:
     Returns:
         List of document dicts with id, content, metadata, and raw fields
     """
-    documents = []
     content_path = Path(directory)
+    files = []
     
     # Scan both entries and summaries directories
     for subdir in ["entries", "summaries"]:
@@ -36,18 +101,35 @@ def load_content(directory: str) -> list[dict]:
             logger.warning(f"Directory not found: {subdir_path}")
             continue
             
-        for file in subdir_path.glob("*.yaml"):
-            try:
-                doc = load_single_file(file)
-                if doc:
-                    documents.append(doc)
-            except Exception as e:
-                logger.error(f"Failed to load {file}: {e}")
+        # scandir hands back the d_type from readdir, so filtering to
+        # regular *.yaml files costs no extra stat() per entry
+        with os.scandir(subdir_path) as it:
+            files.extend(
+                entry.path for entry in it
+                if entry.name.endswith(".yaml") and entry.is_file()
+            )
+    
+    # Threads overlap the per-file open/read; map() keeps scan order
+    if len(files) < _PARALLEL_LOAD_MIN_FILES:
+        loaded = [_load_file_or_log(file) for file in files]
+    else:
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 4)) as pool:
+            loaded = list(pool.map(_load_file_or_log, files))
+    documents = [doc for doc in loaded if doc]
                 
     logger.info(f"Loaded {len(documents)} documents from {directory}")
     return documents
 
 
+def _load_file_or_log(file: str) -> Optional[dict]:
+    """load_single_file, logging failures instead of raising."""
+    try:
+        return load_single_file(Path(file))
+    except Exception as e:
+        logger.error(f"Failed to load {file}: {e}")
+        return None
+
+
 def load_single_file(file_path: Path) -> Optional[dict]:
     """
     Load a single YAML file into a document dict.
@@ -58,8 +140,8 @@ def load_single_file(file_path: Path) -> Optional[dict]:
     Returns:
         Document dict or None if invalid
     """
-    with open(file_path) as f:
-        entry = yaml.load(f)
+    with open(file_path, "rb") as f:
+        entry = parse_yaml(f)
         
     if not entry or "id" not in entry:
         logger.warning(f"Skipping {file_path}: missing 'id' field")
@@ -146,30 +228,37 @@ def flatten_document(entry: dict) -> str:
             parts.append(f"  Rationale: {rationale}")
     
     # Open questions (both types)
-    for question in entry.get("open_questions", []):
-        parts.append(f"Open question: {question}")
+    parts.extend(f"Open question: {question}" for question in entry.get("open_questions", []))
     
     # Outcome (entry-specific)
     outcome = entry.get("outcome", {})
     if outcome:
-        for item in outcome.get("worked", []):
-            parts.append(f"Worked: {item}")
-        for item in outcome.get("failed", []):
-            parts.append(f"Failed: {item}")
-        for item in outcome.get("surprised", []):
-            parts.append(f"Surprised: {item}")
+        parts.extend(f"Worked: {item}" for item in outcome.get("worked", []))
+        parts.extend(f"Failed: {item}" for item in outcome.get("failed", []))
+        parts.extend(f"Surprised: {item}" for item in outcome.get("surprised", []))
     
     # Links (both types)
-    for link in entry.get("links", []):
-        link_id = link.get("id", "")
-        relationship = link.get("relationship", "")
-        parts.append(f"Link: {link_id} ({relationship})")
+    parts.extend(
+        f"Link: {link.get('id', '')} ({link.get('relationship', '')})"
+        for link in entry.get("links", [])
+    )
     
     return "\n".join(parts)
 
 
-def get_entry_by_id(documents: list[dict], entry_id: str) -> Optional[dict]:
-    """Find a document by ID."""
+def build_id_index(documents: list[dict]) -> dict[str, dict]:
+    """Map document ID -> document, for repeated get_entry_by_id lookups."""
+    return {doc["id"]: doc for doc in documents}
+
+
+def get_entry_by_id(documents: dict[str, dict] | list[dict], entry_id: str) -> Optional[dict]:
+    """Find a document by ID.
+
+    Pass an index from build_id_index for O(1) lookups; a plain document
+    list is still accepted and scanned.
+    """
+    if isinstance(documents, dict):
+        return documents.get(entry_id)
     for doc in documents:
         if doc["id"] == entry_id:
             return doc
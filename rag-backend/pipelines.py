@@ -4,24 +4,36 @@ Algerknown RAG - Pipeline Definitions
 jig pipeline configurations for query synthesis and proposal generation.
 """
 
+import asyncio
 import json
 import logging
+import os
+import time
+from collections.abc import Sequence
+from typing import Any
 
 from jig import (
     CompletionParams,
+    MapResult,
     Message,
     PipelineConfig,
     Role,
+    SpanKind,
     Step,
     TracingLogger,
+    run_pipeline,
 )
 from jig.core.errors import JigLLMError
 
-from synthesizer import build_synthesis_prompt
+from synthesizer import NO_DOCUMENTS_ANSWER, build_synthesis_prompt
 from proposer import build_proposal_prompt, parse_proposal_response
 
 logger = logging.getLogger(__name__)
 
+# Max pipeline runs in flight at once in map_pipeline_concurrent
+# (configurable via PIPELINE_CONCURRENCY env var)
+DEFAULT_PIPELINE_CONCURRENCY = int(os.getenv("PIPELINE_CONCURRENCY", "8"))
+
 
 # ============ Step Functions ============
 
@@ -43,7 +55,7 @@ async def synthesize_step(ctx: dict) -> dict:
 
     if not retrieved:
         return {
-            "answer": "No relevant documents found for your query.",
+            "answer": NO_DOCUMENTS_ANSWER,
             "sources": [],
         }
 
@@ -153,3 +165,56 @@ def build_proposal_pipeline(tracer: TracingLogger) -> PipelineConfig:
         ],
         tracer=tracer,
     )
+
+
+# ============ Batch Runner ============
+
+
+async def map_pipeline_concurrent(
+    config: PipelineConfig,
+    items: Sequence[Any],
+    context: dict[str, Any] | None = None,
+    max_concurrency: int | None = None,
+) -> MapResult:
+    """Run a pipeline over items concurrently, under one batch trace.
+
+    Same contract as jig's map_pipeline (which awaits each item in turn),
+    but the per-item runs overlap, so a batch of proposals costs roughly
+    the slowest LLM call instead of the sum of all of them. Results keep
+    the order of items.
+
+    Args:
+        config: Pipeline to run for each item
+        items: Pipeline inputs
+        context: Shared context (each run gets its own copy)
+        max_concurrency: Max runs in flight (defaults to PIPELINE_CONCURRENCY env var or 8;
+            values below 1 run one item at a time)
+    """
+    if max_concurrency is None:
+        max_concurrency = DEFAULT_PIPELINE_CONCURRENCY
+
+    start = time.time()
+    parent = config.tracer.start_trace(
+        f"{config.name}_batch",
+        metadata={"item_count": len(items), **(config.metadata or {})},
+        kind=SpanKind.PIPELINE_RUN,
+    )
+    # A zero semaphore would never let a run start
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(item: Any):
+        async with semaphore:
+            return await run_pipeline(
+                config, item, context=context, _parent_span_id=parent.id
+            )
+
+    results = list(await asyncio.gather(*(run_one(item) for item in items)))
+
+    config.tracer.end_span(parent.id, output={"item_count": len(results)})
+
+    return MapResult(
+        results=results,
+        trace_id=parent.trace_id,
+        duration_ms=(time.time() - start) * 1000,
+        scores=None,
+    )
@@ -8,7 +8,10 @@ Identifies related summaries and builds prompts for proposing structured updates
 import json
 import os
 import logging
+import re
+from functools import lru_cache
 
+from jsonutil import loads as _loads
 from vectorstore import VectorStore
 
 logger = logging.getLogger(__name__)
@@ -16,6 +19,11 @@ logger = logging.getLogger(__name__)
 # Default max proposals (configurable via MAX_PROPOSALS env var)
 DEFAULT_MAX_PROPOSALS = int(os.getenv("MAX_PROPOSALS", "5"))
 
+# Body of the first ```json (or, failing that, bare ```) fence in an LLM
+# response, up to the closing fence or the end of the text if it's unclosed
+_JSON_BLOCK_RE = re.compile(r"```json(.*?)(?:```|\Z)", re.DOTALL)
+_CODE_BLOCK_RE = re.compile(r"```(.*?)(?:```|\Z)", re.DOTALL)
+
 
 async def identify_related_summaries(
     entry: dict,
@@ -48,19 +56,22 @@ async def identify_related_summaries(
         return []
 
     candidates = {}  # id -> {doc, score}
+    # First occurrence wins, matching a front-to-back scan
+    summaries_by_id = {}
+    for summary in all_summaries:
+        summaries_by_id.setdefault(summary["id"], summary)
 
     # 1. Check explicit links in entry (highest priority)
     raw_entry = entry.get("raw", {})
     for link in raw_entry.get("links", []):
         link_id = link.get("id", "")
-        for summary in all_summaries:
-            if summary["id"] == link_id:
-                candidates[link_id] = {
-                    **summary,
-                    "score": 1.0,
-                    "match_reason": "explicit_link"
-                }
-                break
+        summary = summaries_by_id.get(link_id)
+        if summary is not None:
+            candidates[link_id] = {
+                **summary,
+                "score": 1.0,
+                "match_reason": "explicit_link"
+            }
 
     # 2. Semantic similarity search
     similar = await vector_store.query(
@@ -82,7 +93,7 @@ async def identify_related_summaries(
 
     # 3. Tag/topic overlap boosting
     entry_metadata = entry.get("metadata", {})
-    entry_tags = set(entry_metadata.get("tags", "").split(",")) if entry_metadata.get("tags") else set()
+    entry_tags = _tag_set(entry_metadata.get("tags", ""))
     entry_topic = entry_metadata.get("topic", "")
 
     for summary in all_summaries:
@@ -100,8 +111,7 @@ async def identify_related_summaries(
             score_boost += 0.3
 
         # Tag overlap
-        s_tags = set(s_metadata.get("tags", "").split(",")) if s_metadata.get("tags") else set()
-        common_tags = entry_tags.intersection(s_tags)
+        common_tags = entry_tags & _tag_set(s_metadata.get("tags", ""))
         if common_tags:
             score_boost += 0.1 * len(common_tags)
 
@@ -126,6 +136,15 @@ async def identify_related_summaries(
     return sorted_candidates[:max_results]
 
 
+@lru_cache(maxsize=1024)
+def _tag_set(tags: str | None) -> frozenset[str]:
+    """Split a comma-joined metadata tags string into a set.
+
+    Cached because every ingest re-splits the tags of every summary.
+    """
+    return frozenset(tags.split(",")) if tags else frozenset()
+
+
 def build_proposal_prompt(entry: dict, summary: dict) -> str:
     """
     Build the proposal prompt for a single entry-summary pair.
@@ -190,18 +209,33 @@ def parse_proposal_response(text: str, summary: dict, entry: dict) -> dict:
     Raises:
         json.JSONDecodeError: If the response cannot be parsed as JSON.
     """
-    text = text.strip()
-
-    # Handle potential markdown code blocks
-    if "```json" in text:
-        text = text.split("```json")[1].split("```")[0]
-    elif "```" in text:
-        text = text.split("```")[1].split("```")[0]
-
-    proposal = json.loads(text.strip())
+    proposal = _load_proposal_json(text)
     proposal["target_summary_id"] = summary["id"]
     proposal["source_entry_id"] = entry["id"]
     proposal["match_score"] = summary.get("score", 0)
     proposal["match_reason"] = summary.get("match_reason", "")
 
     return proposal
+
+
+def is_parseable_proposal(text: str) -> bool:
+    """Whether an LLM response parses as a proposal object.
+
+    Lets the ingest LLM cache keep only responses `parse_proposal_response`
+    can use.
+    """
+    try:
+        return isinstance(_load_proposal_json(text), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+def _load_proposal_json(text: str):
+    text = text.strip()
+
+    # Handle potential markdown code blocks
+    block = _JSON_BLOCK_RE.search(text) or _CODE_BLOCK_RE.search(text)
+    if block:
+        text = block.group(1)
+
+    return _loads(text.strip())
@@ -6,11 +6,38 @@ prompts for generating synthesized answers with citations.
 """
 
 import logging
+from typing import AsyncIterator, Optional
 
 from jig import LLMClient, CompletionParams, Message, Role
+from jig.llm import AnthropicClient
+
+from llm_cache import CachingLLMClient
 
 logger = logging.getLogger(__name__)
 
+# Answer returned without calling the LLM when retrieval finds nothing
+NO_DOCUMENTS_ANSWER = "No relevant documents found for your query."
+
+
+def _cached_system_params(llm_client: LLMClient, system_prompt: str) -> Optional[dict]:
+    """
+    Anthropic provider_params marking the system prompt as a prompt-cache prefix.
+
+    AnthropicClient merges these over its request kwargs, replacing the
+    plain-string system with a single ephemeral-cached text block. The
+    other jig clients merge provider_params into their requests too, where
+    an Anthropic-shaped `system` would be wrong, so they get None.
+    """
+    if isinstance(llm_client, CachingLLMClient):
+        llm_client = llm_client.client
+    if not isinstance(llm_client, AnthropicClient):
+        return None
+    return {
+        "system": [
+            {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+        ]
+    }
+
 
 def build_synthesis_prompt(
     query: str,
@@ -77,6 +104,37 @@ Provide a synthesized answer with citations:"""
     return prompt, source_ids
 
 
+async def stream_synthesis(prompt: str, llm_client: LLMClient) -> AsyncIterator[str]:
+    """
+    Yield the synthesized answer as text deltas, as the LLM produces them.
+
+    Clients without streaming support (jig's base `stream` raises
+    NotImplementedError, e.g. dispatch) yield the full completion as one chunk.
+
+    Args:
+        prompt: Prompt from build_synthesis_prompt
+        llm_client: jig LLMClient instance
+
+    Yields:
+        Answer text fragments; an error message fragment if the LLM fails.
+    """
+    params = CompletionParams(
+        messages=[Message(role=Role.USER, content=prompt)],
+        max_tokens=1024,
+    )
+
+    try:
+        try:
+            async for text in llm_client.stream(params):
+                yield text
+        except NotImplementedError:
+            response = await llm_client.complete(params)
+            yield response.content
+    except Exception as e:
+        logger.error(f"LLM error in streamed synthesis: {e}")
+        yield f"Error generating answer: {str(e)}"
+
+
 def build_followup_system_prompt(retrieved_entries: list[dict]) -> str:
     """
     Build the system prompt for follow-up queries.
@@ -132,6 +190,9 @@ async def synthesize_with_followup(
     Returns:
         Dict with answer and sources
     """
+    if not retrieved_entries:
+        return {"answer": NO_DOCUMENTS_ANSWER, "sources": []}
+
     # Only first 10 entries are included in the prompt
     context_entries = retrieved_entries[:10]
     system_prompt = build_followup_system_prompt(context_entries)
@@ -144,10 +205,13 @@ async def synthesize_with_followup(
     messages.append(Message(role=Role.USER, content=query))
 
     try:
+        # The system prompt (instructions + documents) is identical on every
+        # turn of a conversation, so later turns can reuse Anthropic's cache
         response = await llm_client.complete(CompletionParams(
             messages=messages,
             system=system_prompt,
             max_tokens=1024,
+            provider_params=_cached_system_params(llm_client, system_prompt),
         ))
 
         return {
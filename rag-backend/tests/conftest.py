@@ -10,17 +10,104 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 # Add tests directory to path so tests can import helpers
 sys.path.insert(0, str(Path(__file__).parent))
 
+import atexit
+import importlib.util
 import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
+from fastapi.testclient import TestClient
+from jig.llm import AnthropicClient
+from jig.tracing import SQLiteTracer
 
 from helpers import make_llm_response
 
 # Set test environment variables
 os.environ["OPENAI_API_KEY"] = "test-key"
 os.environ["ANTHROPIC_API_KEY"] = "test-key"
+# Everything the app writes lives under a fresh per-run, per-xdist-worker
+# ("master" when running serially) directory, so neither `pytest -n auto`
+# workers nor successive runs share a content dir, memory DB, trace DB or
+# changelog. api reads these at import time.
+_WORKER = os.environ.get("PYTEST_XDIST_WORKER", "master")
+_TEST_ROOT = tempfile.mkdtemp(prefix=f"algerknown-test-{_WORKER}-")
+atexit.register(shutil.rmtree, _TEST_ROOT, ignore_errors=True)
+os.environ["CONTENT_DIR"] = os.path.join(_TEST_ROOT, "content")
+os.environ["CHROMA_DB_DIR"] = os.path.join(_TEST_ROOT, "memory.db")
+os.environ["USE_MOCK_EMBEDDINGS"] = "true"
+os.environ["TRACER_DB_PATH"] = os.path.join(_TEST_ROOT, "traces.db")
+os.makedirs(os.environ["CONTENT_DIR"], exist_ok=True)
+
+# Import the app once per session, during collection, so route registration
+# and pydantic model building aren't billed to whichever test runs first.
+import api  # noqa: E402
+from diff_engine import Changelog, VersionCache  # noqa: E402
+from jobs import JobStore  # noqa: E402
+from vectorstore import VectorStore  # noqa: E402
+
+
+@asynccontextmanager
+async def _test_lifespan(app):
+    """Stand-in for api.lifespan that skips the memory store and content load.
+
+    app.state is built the same way as in production, but api.vector_store
+    is a spec'd mock and entries_cache starts empty, so startup never opens
+    the memory DB, embeds anything or walks CONTENT_DIR. Tests that need
+    documents seed the cache or install api_mocks themselves.
+    """
+    store = MagicMock(spec=VectorStore)
+    store.count.return_value = 0
+    store.query.return_value = []
+    store.get_summaries.return_value = []
+    api.vector_store = store
+    api.entries_cache = {}
+    api.changelog = Changelog(Path(api.CONTENT_DIR) / "changelog.jsonl")
+    api.version_cache = VersionCache(Path(api.CONTENT_DIR) / ".version_cache")
+
+    app.state.query_llm, app.state.ingest_llm = api.create_cached_llm_clients()
+    app.state.tracer = SQLiteTracer(db_path=os.environ["TRACER_DB_PATH"])
+    app.state.job_store = JobStore()
+
+    yield
+
+    await app.state.tracer.close()
+
+
+api.app.router.lifespan_context = _test_lifespan
+
+
+@pytest.fixture(scope="session")
+def client():
+    """One TestClient for the whole session, so the (test) lifespan runs once.
+
+    Tests that need different collaborators swap the module globals
+    (api.vector_store, api.CONTENT_DIR, ...) with monkeypatch rather than
+    relying on a fresh startup.
+    """
+    # uvloop ships with uvicorn[standard] on Linux/macOS; anyio falls back
+    # to the stock asyncio loop where it isn't installed (e.g. Windows)
+    use_uvloop = importlib.util.find_spec("uvloop") is not None
+    with TestClient(api.app, backend_options={"use_uvloop": use_uvloop}) as c:
+        yield c
 
 
 @pytest.fixture
 def mock_llm_response():
     """Factory fixture for creating mock LLM responses."""
     return make_llm_response
+
+
+@pytest.fixture(autouse=True)
+def mock_anthropic(monkeypatch):
+    """Answer AnthropicClient calls in-memory so no test reaches the network.
+
+    Tests that patch the pipeline never hit this; anything that lets a real
+    AnthropicClient run gets a canned reply. The SDK ships its own vendored
+    HTTP stack, so the client method is replaced rather than the transport.
+    """
+    complete = AsyncMock(return_value=make_llm_response("Mocked answer"))
+    monkeypatch.setattr(AnthropicClient, "complete", complete)
+    return complete
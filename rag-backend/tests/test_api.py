@@ -3,136 +3,222 @@ Tests for the API endpoints.
 """
 
 import asyncio
-import os
-import tempfile
-from unittest.mock import AsyncMock, patch, MagicMock
+import shutil
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 import httpx
-
-# Mock environment variables before importing api
-os.environ["CONTENT_DIR"] = "/tmp/test-content"
-os.environ["CHROMA_DB_DIR"] = "/tmp/test-chroma"
-os.environ["USE_MOCK_EMBEDDINGS"] = "true"
+import time_machine
+import yaml
+from fastapi import HTTPException
+from jig import MapResult, PipelineResult
+from jig.core.types import LLMClient
+from jig.llm import AnthropicClient, DispatchClient
+
+# conftest sets the test environment and warms up the import
+import api
+from api import app
+from diff_engine import Changelog
+from jobs import JobStatus, JobStore
+from llm_cache import CachingLLMClient
+from vectorstore import VectorStore
+
+# Serialized once; tests that need an entry on disk write these bytes as-is
+ENTRY_TEMPLATE = (
+    b"id: test-entry\n"
+    b"type: entry\n"
+    b"topic: Test Topic\n"
+    b"content: Test content\n"
+    b"tags:\n"
+    b"- test\n"
+    b"- example\n"
+)
+
+
+@pytest.fixture(scope="session")
+def seed_entry_dir(tmp_path_factory):
+    """Content dir holding a single entry, written once and copied per test."""
+    content_dir = tmp_path_factory.mktemp("seed")
+    entries_dir = content_dir / "entries"
+    entries_dir.mkdir()
+    (entries_dir / "test-entry.yaml").write_bytes(ENTRY_TEMPLATE)
+    return content_dir
+
+
+@pytest.fixture
+def content_dir(seed_entry_dir, tmp_path, monkeypatch):
+    """Per-test copy of the seed content dir, installed as api.CONTENT_DIR."""
+    content_dir = tmp_path / "content"
+    shutil.copytree(seed_entry_dir, content_dir)
+    monkeypatch.setattr(api, "CONTENT_DIR", str(content_dir))
+    return content_dir
+
+
+@pytest.fixture
+def api_changelog(tmp_path, monkeypatch):
+    """Fresh Changelog installed as api.changelog for one test."""
+    changelog = Changelog(tmp_path / "changelog.jsonl")
+    monkeypatch.setattr(api, "changelog", changelog)
+    return changelog
+
+
+@pytest.fixture(autouse=True)
+def isolated_entries_cache(monkeypatch):
+    """Give each test an empty entries_cache; the original comes back on teardown."""
+    monkeypatch.setattr(api, "entries_cache", {})
+
+
+@pytest.fixture
+def api_mocks(monkeypatch):
+    """Swap api's collaborators for mocks; tests set return values as needed."""
+    # spec'd mocks hand back AsyncMocks for VectorStore's coroutine methods.
+    # Built fresh per test: copy.copy of a prototype would share child mocks
+    # (and their call records and return values) between tests.
+    store = MagicMock(spec=VectorStore)
+    store.index_documents.return_value = 1
+    store.count.return_value = 0
+    mocks = SimpleNamespace(
+        store=store,
+        run_pipeline=AsyncMock(),
+        load_content=MagicMock(return_value=[]),
+        apply_update=MagicMock(),
+        identify_related_summaries=AsyncMock(return_value=[]),
+        map_pipeline_concurrent=AsyncMock(),
+    )
+    monkeypatch.setattr(api, "vector_store", mocks.store)
+    monkeypatch.setattr(api, "run_pipeline", mocks.run_pipeline)
+    monkeypatch.setattr(api, "load_content", mocks.load_content)
+    monkeypatch.setattr(api, "apply_update", mocks.apply_update)
+    monkeypatch.setattr(api, "identify_related_summaries", mocks.identify_related_summaries)
+    monkeypatch.setattr(api, "map_pipeline_concurrent", mocks.map_pipeline_concurrent)
+    return mocks
+
+
+@pytest.fixture
+def asgi_app_state(monkeypatch):
+    """Private app.state for tests that drive the app via httpx.ASGITransport.
+
+    httpx.ASGITransport in 0.28 does not fire FastAPI's lifespan, so every
+    bit of state lifespan builds — job_store, tracer, LLM clients — has to
+    be pinned by the test (api_mocks covers vector_store). The session
+    client's state is bound to the TestClient's event loop, and its
+    SQLiteTracer may still be flushing jobs started by earlier tests, so
+    these tests never share it. monkeypatch restores whatever lifespan last
+    produced (or removes it, if this was the first test to run).
+    """
+    mock_tracer = MagicMock()
+    mock_tracer.flush = AsyncMock()
+    mock_tracer.close = AsyncMock()
+
+    monkeypatch.setattr(app.state, "job_store", JobStore(), raising=False)
+    monkeypatch.setattr(app.state, "tracer", mock_tracer, raising=False)
+    monkeypatch.setattr(app.state, "query_llm", MagicMock(spec=LLMClient), raising=False)
+    monkeypatch.setattr(app.state, "ingest_llm", MagicMock(spec=LLMClient), raising=False)
+    return app.state
 
 
 class TestCreateLLMClient:
     """Tests for the create_llm_client factory."""
 
     def test_anthropic_provider(self):
-        from api import create_llm_client
-        from jig.llm import AnthropicClient
-
-        client = create_llm_client("anthropic", "claude-sonnet-4-20250514")
+        client = api.create_llm_client("anthropic", "claude-sonnet-4-20250514")
         assert isinstance(client, AnthropicClient)
 
     def test_dispatch_provider(self, monkeypatch):
-        from api import create_llm_client
-        from jig.llm import DispatchClient
-
         monkeypatch.setenv("DISPATCH_URL", "http://localhost:8900")
-        client = create_llm_client("dispatch", "llama-70b")
+        client = api.create_llm_client("dispatch", "llama-70b")
         assert isinstance(client, DispatchClient)
 
     def test_dispatch_requires_url(self, monkeypatch):
-        from api import create_llm_client
-
         monkeypatch.delenv("DISPATCH_URL", raising=False)
         with pytest.raises(ValueError, match="DISPATCH_URL must be set"):
-            create_llm_client("dispatch", "llama-70b")
+            api.create_llm_client("dispatch", "llama-70b")
 
     def test_unknown_provider_raises(self):
-        from api import create_llm_client
-
         with pytest.raises(ValueError, match="Unknown LLM provider"):
-            create_llm_client("openai", "gpt-4o")
+            api.create_llm_client("openai", "gpt-4o")
+
+    def test_cached_clients_wrap_providers(self, monkeypatch):
+        monkeypatch.delenv("LLM_QUERY_PROVIDER", raising=False)
+        monkeypatch.delenv("LLM_INGEST_PROVIDER", raising=False)
+        query_llm, ingest_llm = api.create_cached_llm_clients()
+
+        assert isinstance(query_llm, CachingLLMClient)
+        assert isinstance(ingest_llm, CachingLLMClient)
+        assert isinstance(query_llm.client, AnthropicClient)
+        assert isinstance(ingest_llm.client, AnthropicClient)
+
+    def test_session_app_uses_cached_clients(self, client):
+        """The test lifespan builds app.state's LLMs the way production does."""
+        assert isinstance(app.state.query_llm, CachingLLMClient)
+        assert isinstance(app.state.ingest_llm, CachingLLMClient)
 
 
 class TestHealthEndpoint:
     """Tests for the health check endpoint."""
 
-    def test_health_returns_status(self):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        with TestClient(app) as client:
-            response = client.get("/health")
+    def test_health_returns_status(self, client):
+        response = client.get("/health")
 
-            assert response.status_code == 200
-            data = response.json()
-            assert data["status"] == "healthy"
-            assert "documents_indexed" in data
+        assert response.status_code == 200
+        data = response.json()
+        assert data["status"] == "healthy"
+        assert "documents_indexed" in data
 
 
 class TestJobsEndpoint:
     """Tests for the GET /jobs/{job_id} endpoint."""
 
-    def test_get_missing_job(self):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        with TestClient(app) as client:
-            response = client.get("/jobs/nonexistent")
-            assert response.status_code == 404
-
-    def test_get_existing_job(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        from jobs import JobStatus
-
-        with TestClient(app) as client:
-            # Manually create a job in the store
-            job = app.state.job_store.create("query")
-            app.state.job_store.update(
-                job.id,
-                status=JobStatus.COMPLETE,
-                progress="Complete",
-                result={"answer": "test", "sources": []},
-            )
-
-            response = client.get(f"/jobs/{job.id}")
-            assert response.status_code == 200
-            data = response.json()
-            assert data["job_id"] == job.id
-            assert data["status"] == "complete"
-            assert data["result"]["answer"] == "test"
+    def test_get_missing_job(self, client):
+        response = client.get("/jobs/nonexistent")
+        assert response.status_code == 404
+
+    def test_get_existing_job(self, client):
+        # Manually create a job in the store
+        job = app.state.job_store.create("query")
+        app.state.job_store.update(
+            job.id,
+            status=JobStatus.COMPLETE,
+            progress="Complete",
+            result={"answer": "test", "sources": []},
+        )
+
+        response = client.get(f"/jobs/{job.id}")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["job_id"] == job.id
+        assert data["status"] == "complete"
+        assert data["result"]["answer"] == "test"
 
 
 class TestQueryEndpoint:
     """Tests for the /query endpoint."""
 
-    @patch("api.run_pipeline")
-    def test_query_returns_202_with_job_id(self, mock_run_pipeline):
+    def test_query_returns_202_with_job_id(self, client, api_mocks):
         """Should return 202 with a job_id."""
-        from fastapi.testclient import TestClient
-        from api import app
-
-        # Mock pipeline to complete instantly
-        mock_result = MagicMock()
-        mock_result.output = {"answer": "Test", "sources": ["doc-1"], "model": "test"}
-        mock_run_pipeline.return_value = mock_result
+        # Patched pipeline: a real one would keep writing spans to the
+        # session tracer after this test returns, racing later tests
+        api_mocks.run_pipeline.return_value.output = {"answer": "", "sources": []}
+        response = client.post("/query", json={"query": "What is ZK?", "n_results": 5})
 
-        with TestClient(app) as client:
-            response = client.post("/query", json={"query": "What is ZK?", "n_results": 5})
-
-            assert response.status_code == 202
-            data = response.json()
-            assert "job_id" in data
-            assert data["status"] == "pending"
+        assert response.status_code == 202
+        data = response.json()
+        assert "job_id" in data
+        assert data["status"] == "pending"
 
     @pytest.mark.asyncio
-    @patch("api.run_pipeline")
-    async def test_query_job_completes(self, mock_run_pipeline):
+    async def test_query_job_completes(self, api_mocks, asgi_app_state):
         """Should complete the query job in the background."""
-        from api import app
-
-        mock_result = MagicMock()
+        mock_result = MagicMock(spec=PipelineResult)
+        # Dataclass fields without defaults aren't visible to spec; set it
+        mock_result.trace_id = "trace-1"
         mock_result.output = {
             "answer": "Test answer",
             "sources": ["doc-1"],
             "model": "claude-sonnet-4-20250514",
         }
-        mock_run_pipeline.return_value = mock_result
+        api_mocks.run_pipeline.return_value = mock_result
 
         async with httpx.AsyncClient(
             transport=httpx.ASGITransport(app=app), base_url="http://test"
@@ -154,314 +240,252 @@ class TestQueryEndpoint:
             assert result["result"]["answer"] == "Test answer"
             assert result["result"]["sources"] == ["doc-1"]
 
-    def test_query_validation(self):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        with TestClient(app) as client:
-            response = client.post("/query", json={})
-            assert response.status_code == 422
+    def test_query_validation(self, client):
+        response = client.post("/query", json={})
+        assert response.status_code == 422
 
-            response = client.post("/query", json={"query": "test", "n_results": 100})
-            assert response.status_code == 422
+        response = client.post("/query", json={"query": "test", "n_results": 100})
+        assert response.status_code == 422
 
 
 class TestSearchEndpoint:
     """Tests for the /search endpoint."""
 
-    def test_search_returns_results(self):
-        from fastapi.testclient import TestClient
-        from api import app
+    def test_search_returns_results(self, client, api_mocks):
+        api_mocks.store.query.return_value = [
+            {
+                "id": "doc-1",
+                "content": "n" * 250,
+                "distance": 0.25,
+                "metadata": {"type": "summary", "topic": "Nullifiers"},
+            },
+            {"id": "doc-2", "content": "Short", "metadata": {}},
+        ]
+
+        response = client.post("/search", json={"query": "nullifiers", "n_results": 10})
+
+        assert response.status_code == 200
+        assert response.json()["results"] == [
+            {
+                "id": "doc-1",
+                "topic": "Nullifiers",
+                "type": "summary",
+                "distance": 0.25,
+                "snippet": "n" * 200 + "...",
+            },
+            {"id": "doc-2", "topic": "", "type": "entry", "distance": 0, "snippet": "Short"},
+        ]
+        api_mocks.store.query.assert_awaited_once_with("nullifiers", 10, None)
+
+
+class TestQueryStreamEndpoint:
+    """Tests for the /query/stream endpoint."""
+
+    def test_streams_answer_with_sources_header(self, client, api_mocks, monkeypatch):
+        api_mocks.store.query.return_value = [
+            {"id": "doc-1", "content": "ZK content", "metadata": {"type": "entry", "topic": "ZK"}},
+        ]
+
+        async def stream(params):
+            for text in ("ZK is ", "zero-knowledge [doc-1]."):
+                yield text
+
+        llm = MagicMock(spec=LLMClient)
+        llm.stream = stream
+        monkeypatch.setattr(app.state, "query_llm", llm, raising=False)
 
-        with TestClient(app) as client:
-            response = client.post("/search", json={"query": "nullifiers", "n_results": 10})
+        response = client.post("/query/stream", json={"query": "What is ZK?", "n_results": 3})
 
-            assert response.status_code == 200
-            data = response.json()
-            assert "results" in data
-            assert isinstance(data["results"], list)
+        assert response.status_code == 200
+        assert response.headers["x-sources"] == "doc-1"
+        assert response.text == "ZK is zero-knowledge [doc-1]."
+        api_mocks.store.query.assert_awaited_once_with("What is ZK?", 3)
+
+    def test_no_documents_skips_llm(self, client, api_mocks, monkeypatch):
+        api_mocks.store.query.return_value = []
+        llm = MagicMock(spec=LLMClient)
+        monkeypatch.setattr(app.state, "query_llm", llm, raising=False)
+
+        response = client.post("/query/stream", json={"query": "anything"})
+
+        assert response.status_code == 200
+        assert response.headers["x-sources"] == ""
+        assert response.text == "No relevant documents found for your query."
+        llm.stream.assert_not_called()
 
 
 class TestEntriesEndpoint:
     """Tests for the /entries endpoint."""
 
-    def test_list_entries(self):
-        from fastapi.testclient import TestClient
-        from api import app, entries_cache
-
-        entries_cache["test-1"] = {
+    def test_list_entries(self, client):
+        api.entries_cache["test-1"] = {
             "id": "test-1",
             "content": "Test",
             "metadata": {"type": "entry", "topic": "Test", "status": "active"},
         }
 
-        with TestClient(app) as client:
-            response = client.get("/entries")
+        response = client.get("/entries")
 
-            assert response.status_code == 200
-            data = response.json()
-            assert "entries" in data
-            assert "total" in data
+        assert response.status_code == 200
+        data = response.json()
+        assert "entries" in data
+        assert "total" in data
 
 
 class TestReindexEndpoint:
     """Tests for the /reindex endpoint."""
 
-    @patch("api.load_content")
-    def test_reindex_success(self, mock_load):
-        from fastapi.testclient import TestClient
-        from api import app
+    def test_reindex_success(self, client, api_mocks):
+        documents = [{"id": "doc-1", "content": "Test content", "metadata": {"type": "entry"}}]
+        api_mocks.load_content.return_value = documents
 
-        mock_load.return_value = [
-            {"id": "doc-1", "content": "Test content", "metadata": {"type": "entry"}}
-        ]
+        response = client.post("/reindex")
+
+        assert response.status_code == 200
+        assert response.json() == {"indexed": 1}
+        api_mocks.store.index_documents.assert_awaited_once_with(documents)
+
+
+class TestResolveContentPath:
+    """Tests for the path check shared by /index and /ingest."""
+
+    def test_rejects_path_outside_content_dir(self):
+        with pytest.raises(HTTPException) as exc_info:
+            api._resolve_content_path("/etc/passwd", "/tmp/test-content")
+
+        assert exc_info.value.status_code == 400
+        assert "content directory" in exc_info.value.detail
+
+    def test_rejects_sibling_with_shared_prefix(self):
+        with pytest.raises(HTTPException) as exc_info:
+            api._resolve_content_path("/tmp/test-content-backup/a.yaml", "/tmp/test-content")
+
+        assert exc_info.value.status_code == 400
 
-        with TestClient(app) as client:
-            response = client.post("/reindex")
+    def test_rejects_relative_traversal(self):
+        with pytest.raises(HTTPException):
+            api._resolve_content_path("../etc/passwd", "/tmp/test-content")
 
-            assert response.status_code == 200
-            data = response.json()
-            assert "indexed" in data
+    def test_resolves_relative_path_against_content_dir(self):
+        resolved = api._resolve_content_path("entries/a.yaml", "/tmp/test-content")
+
+        assert resolved == "/tmp/test-content/entries/a.yaml"
 
 
 class TestIndexEndpoint:
     """Tests for the /index endpoint."""
 
-    def test_index_invalid_path(self):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        with TestClient(app) as client:
-            response = client.post("/index", json={"file_path": "/etc/passwd"})
-
-            assert response.status_code == 400
-            assert "content directory" in response.json()["detail"]
-
-    def test_index_file_not_found(self):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            import api
-            old_content_dir = api.CONTENT_DIR
-            api.CONTENT_DIR = tmpdir
-
-            try:
-                with TestClient(app) as client:
-                    response = client.post("/index", json={
-                        "file_path": f"{tmpdir}/nonexistent.yaml"
-                    })
-                    assert response.status_code == 404
-            finally:
-                api.CONTENT_DIR = old_content_dir
-
-    @patch("api.VectorStore")
-    def test_index_does_not_update_last_ingested(self, MockVectorStore):
-        from fastapi.testclient import TestClient
-        from api import app
-        from ruamel.yaml import YAML
-
-        yaml = YAML()
-        yaml.preserve_quotes = True
-
-        mock_store = MagicMock()
-        mock_store.index_documents = AsyncMock(return_value=1)
-        mock_store.count = AsyncMock(return_value=0)
-        mock_store.close = AsyncMock()
-        MockVectorStore.return_value = mock_store
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            entries_dir = os.path.join(tmpdir, "entries")
-            os.makedirs(entries_dir)
-            entry_file = os.path.join(entries_dir, "test-entry.yaml")
-
-            with open(entry_file, "w") as f:
-                yaml.dump({"id": "test-entry", "type": "entry", "topic": "Test", "content": "Test"}, f)
-
-            import api
-            old_content_dir = api.CONTENT_DIR
-            api.CONTENT_DIR = tmpdir
-            api.entries_cache.clear()
-
-            try:
-                with TestClient(app) as client:
-                    response = client.post("/index", json={"file_path": entry_file})
-                    assert response.status_code == 200
-
-                    with open(entry_file) as f:
-                        indexed_entry = yaml.load(f)
-                    assert "last_ingested" not in indexed_entry
-            finally:
-                api.CONTENT_DIR = old_content_dir
-
-    def test_index_indexes_document(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        from ruamel.yaml import YAML
-
-        yaml = YAML()
-        yaml.preserve_quotes = True
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            entries_dir = os.path.join(tmpdir, "entries")
-            os.makedirs(entries_dir)
-            entry_file = os.path.join(entries_dir, "test-entry.yaml")
-
-            with open(entry_file, "w") as f:
-                yaml.dump({
-                    "id": "test-entry", "type": "entry", "topic": "Test Topic",
-                    "content": "Test content", "tags": ["test", "example"]
-                }, f)
-
-            import api
-            old_content_dir = api.CONTENT_DIR
-            api.CONTENT_DIR = tmpdir
-            api.entries_cache.pop("test-entry", None)
-
-            try:
-                with TestClient(app) as client:
-                    response = client.post("/index", json={"file_path": entry_file})
-
-                    assert response.status_code == 200
-                    data = response.json()
-                    assert data["status"] == "indexed"
-                    assert data["id"] == "test-entry"
-                    assert "test-entry" in api.entries_cache
-            finally:
-                api.CONTENT_DIR = old_content_dir
-                api.entries_cache.pop("test-entry", None)
+    def test_index_file_not_found(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(api, "CONTENT_DIR", str(tmp_path))
 
+        response = client.post("/index", json={
+            "file_path": f"{tmp_path}/nonexistent.yaml"
+        })
+        assert response.status_code == 404
 
-class TestIngestEndpoint:
-    """Tests for the /ingest endpoint."""
+    def test_index_indexes_document(self, client, api_mocks, content_dir):
+        """Should index and cache the entry without stamping it or proposing."""
+        entry_file = str(content_dir / "entries" / "test-entry.yaml")
 
-    def test_ingest_invalid_path(self):
-        from fastapi.testclient import TestClient
-        from api import app
+        response = client.post("/index", json={"file_path": entry_file})
 
-        with TestClient(app) as client:
-            response = client.post("/ingest", json={"file_path": "/etc/passwd"})
+        assert response.status_code == 200
+        assert response.json() == {"status": "indexed", "id": "test-entry"}
+        assert "test-entry" in api.entries_cache
+        api_mocks.store.index_documents.assert_awaited_once()
 
-            assert response.status_code == 400
-            assert "content directory" in response.json()["detail"]
+        with open(entry_file) as f:
+            indexed_entry = yaml.safe_load(f)
+        assert "last_ingested" not in indexed_entry
+        api_mocks.identify_related_summaries.assert_not_called()
+        api_mocks.map_pipeline_concurrent.assert_not_called()
 
-    def test_ingest_file_not_found(self):
-        from fastapi.testclient import TestClient
-        from api import app
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            import api
-            old_content_dir = api.CONTENT_DIR
-            api.CONTENT_DIR = tmpdir
+class TestIngestEndpoint:
+    """Tests for the /ingest endpoint."""
+
+    def test_ingest_file_not_found(self, client, tmp_path, monkeypatch):
+        monkeypatch.setattr(api, "CONTENT_DIR", str(tmp_path))
 
-            try:
-                with TestClient(app) as client:
-                    response = client.post("/ingest", json={
-                        "file_path": f"{tmpdir}/nonexistent.yaml"
-                    })
-                    assert response.status_code == 404
-            finally:
-                api.CONTENT_DIR = old_content_dir
+        response = client.post("/ingest", json={
+            "file_path": f"{tmp_path}/nonexistent.yaml"
+        })
+        assert response.status_code == 404
 
-    def test_ingest_returns_202(self):
+    def test_ingest_returns_202(self, client, content_dir):
         """Should return 202 with a job_id for a valid entry."""
-        from fastapi.testclient import TestClient
-        from api import app
-        from ruamel.yaml import YAML
+        entry_file = str(content_dir / "entries" / "test-entry.yaml")
 
-        yaml = YAML()
-        yaml.preserve_quotes = True
+        response = client.post("/ingest", json={"file_path": entry_file})
 
-        with tempfile.TemporaryDirectory() as tmpdir:
-            entries_dir = os.path.join(tmpdir, "entries")
-            os.makedirs(entries_dir)
-            entry_file = os.path.join(entries_dir, "test-entry.yaml")
+        assert response.status_code == 202
+        data = response.json()
+        assert "job_id" in data
+        assert data["status"] == "pending"
 
-            with open(entry_file, "w") as f:
-                yaml.dump({"id": "test-entry", "type": "entry", "topic": "Test", "content": "Test"}, f)
+    @pytest.mark.asyncio
+    async def test_ingest_job_completes(self, api_mocks, asgi_app_state, content_dir):
+        """Should complete the ingest job (no related summaries, empty proposals)."""
+        entry_file = str(content_dir / "entries" / "test-entry.yaml")
 
-            import api
-            old_content_dir = api.CONTENT_DIR
-            api.CONTENT_DIR = tmpdir
-            api.entries_cache.clear()
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.post("/ingest", json={"file_path": entry_file})
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
 
-            try:
-                with TestClient(app) as client:
-                    response = client.post("/ingest", json={"file_path": entry_file})
+            # Poll until complete
+            for _ in range(50):
+                status = await client.get(f"/jobs/{job_id}")
+                if status.json()["status"] in ("complete", "failed"):
+                    break
+                await asyncio.sleep(0.05)
 
-                    assert response.status_code == 202
-                    data = response.json()
-                    assert "job_id" in data
-                    assert data["status"] == "pending"
-            finally:
-                api.CONTENT_DIR = old_content_dir
+            result = status.json()
+            assert result["status"] == "complete"
+            assert result["result"]["entry_id"] == "test-entry"
+            assert isinstance(result["result"]["proposals"], list)
 
     @pytest.mark.asyncio
-    @patch("api.identify_related_summaries")
-    @patch("api.map_pipeline")
-    async def test_ingest_job_completes(self, mock_map_pipeline, mock_identify):
-        """Should complete the ingest job (no related summaries, empty proposals)."""
-        from api import app
-        from ruamel.yaml import YAML
-
-        yaml = YAML()
-        yaml.preserve_quotes = True
-
-        mock_identify.return_value = []
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            entries_dir = os.path.join(tmpdir, "entries")
-            os.makedirs(entries_dir)
-            entry_file = os.path.join(entries_dir, "test-entry.yaml")
-
-            with open(entry_file, "w") as f:
-                yaml.dump({"id": "test-entry", "type": "entry", "topic": "Test", "content": "Test"}, f)
-
-            import api
-            old_content_dir = api.CONTENT_DIR
-            api.CONTENT_DIR = tmpdir
-            api.entries_cache.clear()
-
-            try:
-                async with httpx.AsyncClient(
-                    transport=httpx.ASGITransport(app=app), base_url="http://test"
-                ) as client:
-                    response = await client.post("/ingest", json={"file_path": entry_file})
-                    assert response.status_code == 202
-                    job_id = response.json()["job_id"]
-
-                    # Poll until complete
-                    for _ in range(50):
-                        status = await client.get(f"/jobs/{job_id}")
-                        if status.json()["status"] in ("complete", "failed"):
-                            break
-                        await asyncio.sleep(0.05)
-
-                    result = status.json()
-                    assert result["status"] == "complete"
-                    assert result["result"]["entry_id"] == "test-entry"
-                    assert isinstance(result["result"]["proposals"], list)
-            finally:
-                api.CONTENT_DIR = old_content_dir
+    async def test_ingest_updates_last_ingested(self, api_mocks, asgi_app_state, content_dir):
+        """Should stamp last_ingested with today's date in the entry file."""
+        entry_file = str(content_dir / "entries" / "test-entry.yaml")
+
+        # Pin the clock so the assertion can't straddle midnight
+        with time_machine.travel("2024-01-15", tick=False):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://test"
+            ) as client:
+                response = await client.post("/ingest", json={"file_path": entry_file})
+                assert response.status_code == 202
+                job_id = response.json()["job_id"]
+
+                for _ in range(50):
+                    status = await client.get(f"/jobs/{job_id}")
+                    if status.json()["status"] in ("complete", "failed"):
+                        break
+                    await asyncio.sleep(0.05)
+
+                assert status.json()["status"] == "complete"
+
+        with open(entry_file) as f:
+            updated_entry = yaml.safe_load(f)
+        assert updated_entry["last_ingested"] == "2024-01-15"
+        assert api.entries_cache["test-entry"]["metadata"]["last_ingested"] == "2024-01-15"
 
     @pytest.mark.asyncio
-    @patch("api.identify_related_summaries")
-    @patch("api.map_pipeline")
-    async def test_ingest_job_completes_with_proposals(self, mock_map_pipeline, mock_identify):
+    async def test_ingest_job_completes_with_proposals(self, api_mocks, asgi_app_state, content_dir):
         """Should complete the ingest job with proposals when related summaries found."""
-        from api import app
-        from ruamel.yaml import YAML
-
-        yaml = YAML()
-        yaml.preserve_quotes = True
-
-        mock_identify.return_value = [
+        api_mocks.identify_related_summaries.return_value = [
             {"id": "summary-1", "content": "S1", "metadata": {}, "score": 0.9, "match_reason": "semantic"},
         ]
 
-        # Mock map_pipeline to return a proposal result
-        mock_result = MagicMock()
-        mock_proposal_result = MagicMock()
+        # Mock map_pipeline_concurrent to return a proposal result
+        mock_result = MagicMock(spec=MapResult)
+        # Dataclass fields without defaults aren't visible to spec; set it
+        mock_result.trace_id = "trace-1"
+        mock_proposal_result = MagicMock(spec=PipelineResult)
         mock_proposal_result.output = {
             "target_summary_id": "summary-1",
             "source_entry_id": "test-entry",
@@ -469,343 +493,184 @@ class TestIngestEndpoint:
             "rationale": "Test",
         }
         mock_result.results = [mock_proposal_result]
-        mock_map_pipeline.return_value = mock_result
-
-        # httpx.ASGITransport in 0.28 does not fire FastAPI's lifespan, so
-        # every bit of state lifespan builds — vector_store, job_store,
-        # tracer, LLM clients — has to be pinned by the test. A prior
-        # TestClient test may have set them, but standalone runs start cold
-        # and bound-to-dead-loop state from earlier tests is worse than no
-        # state. Override everything the /ingest path touches, then restore
-        # in finally so the next test starts from whatever lifespan last
-        # produced (or None, if this was the first test to run).
-        from jobs import JobStore
-
-        import api
-        mock_store = MagicMock()
-        mock_store.index_documents = AsyncMock(return_value=1)
-        mock_store.count = AsyncMock(return_value=0)
-        mock_store.close = AsyncMock()
-        old_store = api.vector_store
-        api.vector_store = mock_store
-
-        mock_tracer = MagicMock()
-        mock_tracer.flush = AsyncMock()
-        mock_tracer.close = AsyncMock()
-
-        old_job_store = getattr(app.state, "job_store", None)
-        old_tracer = getattr(app.state, "tracer", None)
-        old_query_llm = getattr(app.state, "query_llm", None)
-        old_ingest_llm = getattr(app.state, "ingest_llm", None)
-
-        app.state.job_store = JobStore()
-        app.state.tracer = mock_tracer
-        app.state.query_llm = MagicMock()
-        app.state.ingest_llm = MagicMock()
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            entries_dir = os.path.join(tmpdir, "entries")
-            os.makedirs(entries_dir)
-            entry_file = os.path.join(entries_dir, "test-entry.yaml")
-
-            with open(entry_file, "w") as f:
-                yaml.dump({"id": "test-entry", "type": "entry", "topic": "Test", "content": "Test"}, f)
-
-            old_content_dir = api.CONTENT_DIR
-            api.CONTENT_DIR = tmpdir
-            api.entries_cache.clear()
-
-            try:
-                async with httpx.AsyncClient(
-                    transport=httpx.ASGITransport(app=app), base_url="http://test"
-                ) as client:
-                    response = await client.post("/ingest", json={"file_path": entry_file})
-                    assert response.status_code == 202
-                    job_id = response.json()["job_id"]
-
-                    for _ in range(50):
-                        status = await client.get(f"/jobs/{job_id}")
-                        if status.json()["status"] in ("complete", "failed"):
-                            break
-                        await asyncio.sleep(0.05)
-
-                    result = status.json()
-                    assert result["status"] == "complete"
-                    assert result["result"]["entry_id"] == "test-entry"
-                    assert len(result["result"]["proposals"]) == 1
-                    assert result["result"]["proposals"][0]["target_summary_id"] == "summary-1"
-                    assert result["progress_detail"] is None  # cleared on completion
-            finally:
-                api.CONTENT_DIR = old_content_dir
-                api.vector_store = old_store
-                app.state.job_store = old_job_store
-                app.state.tracer = old_tracer
-                app.state.query_llm = old_query_llm
-                app.state.ingest_llm = old_ingest_llm
+        api_mocks.map_pipeline_concurrent.return_value = mock_result
+
+        entry_file = str(content_dir / "entries" / "test-entry.yaml")
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.post("/ingest", json={"file_path": entry_file})
+            assert response.status_code == 202
+            job_id = response.json()["job_id"]
+
+            for _ in range(50):
+                status = await client.get(f"/jobs/{job_id}")
+                if status.json()["status"] in ("complete", "failed"):
+                    break
+                await asyncio.sleep(0.05)
+
+            result = status.json()
+            assert result["status"] == "complete"
+            assert result["result"]["entry_id"] == "test-entry"
+            assert len(result["result"]["proposals"]) == 1
+            assert result["result"]["proposals"][0]["target_summary_id"] == "summary-1"
+            assert result["progress_detail"] is None  # cleared on completion
 
 
 class TestEntriesWithLastIngested:
     """Tests for the /entries endpoint with last_ingested field."""
 
-    def test_entries_includes_last_ingested(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        import api
-
-        with TestClient(app) as client:
-            api.entries_cache["test-with-date"] = {
-                "id": "test-with-date",
-                "content": "Test content",
-                "metadata": {"type": "entry", "topic": "Test", "status": "active",
-                             "file_path": "/test/path.yaml", "last_ingested": "2024-01-15"},
-                "raw": {"id": "test-with-date", "last_ingested": "2024-01-15"},
-            }
-            api.entries_cache["test-without-date"] = {
-                "id": "test-without-date",
-                "content": "Test content",
-                "metadata": {"type": "entry", "topic": "Test", "status": "active",
-                             "file_path": "/test/path2.yaml"},
-                "raw": {"id": "test-without-date"},
-            }
+    def test_entries_includes_last_ingested(self, client):
+        api.entries_cache["test-with-date"] = {
+            "id": "test-with-date",
+            "content": "Test content",
+            "metadata": {"type": "entry", "topic": "Test", "status": "active",
+                         "file_path": "/test/path.yaml", "last_ingested": "2024-01-15"},
+            "raw": {"id": "test-with-date", "last_ingested": "2024-01-15"},
+        }
+        api.entries_cache["test-without-date"] = {
+            "id": "test-without-date",
+            "content": "Test content",
+            "metadata": {"type": "entry", "topic": "Test", "status": "active",
+                         "file_path": "/test/path2.yaml"},
+            "raw": {"id": "test-without-date"},
+        }
 
-            try:
-                response = client.get("/entries")
-                assert response.status_code == 200
-                data = response.json()
-                entries_by_id = {e["id"]: e for e in data["entries"]}
-                assert entries_by_id["test-with-date"]["last_ingested"] == "2024-01-15"
-                assert entries_by_id["test-without-date"]["last_ingested"] is None
-            finally:
-                api.entries_cache.pop("test-with-date", None)
-                api.entries_cache.pop("test-without-date", None)
+        response = client.get("/entries")
+        assert response.status_code == 200
+        data = response.json()
+        entries_by_id = {e["id"]: e for e in data["entries"]}
+        assert entries_by_id["test-with-date"]["last_ingested"] == "2024-01-15"
+        assert entries_by_id["test-without-date"]["last_ingested"] is None
 
 
 class TestApproveEndpoint:
     """Tests for the /approve endpoint."""
 
-    @patch("api.apply_update")
-    @patch("api.load_content")
-    @patch("api.VectorStore")
-    def test_approve_success(self, MockVectorStore, mock_load, mock_apply):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        mock_store = MagicMock()
-        mock_store.index_documents = AsyncMock(return_value=1)
-        mock_store.count = AsyncMock(return_value=0)
-        mock_store.close = AsyncMock()
-        MockVectorStore.return_value = mock_store
-
-        mock_apply.return_value = {"success": True, "file": "/path/to/file.yaml", "changes": ["Added learning"]}
-        mock_load.return_value = []
-
-        with TestClient(app) as client:
-            response = client.post("/approve", json={
-                "proposal": {
-                    "target_summary_id": "test-summary",
-                    "source_entry_id": "test-entry",
-                    "new_learnings": [{"insight": "Test", "context": "Test"}],
-                }
-            })
-            assert response.status_code == 200
-            assert response.json()["success"] is True
-
-    @patch("api.apply_update")
-    def test_approve_failure(self, mock_apply):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        mock_apply.return_value = {"success": False, "error": "File not found"}
-
-        with TestClient(app) as client:
-            response = client.post("/approve", json={
-                "proposal": {"target_summary_id": "nonexistent", "source_entry_id": "test-entry"}
-            })
-            assert response.status_code == 200
-            assert response.json()["success"] is False
+    def test_approve_success(self, client, api_mocks):
+        api_mocks.apply_update.return_value = {
+            "success": True, "file": "/path/to/file.yaml", "changes": ["Added learning"],
+        }
+
+        response = client.post("/approve", json={
+            "proposal": {
+                "target_summary_id": "test-summary",
+                "source_entry_id": "test-entry",
+                "new_learnings": [{"insight": "Test", "context": "Test"}],
+            }
+        })
+        assert response.status_code == 200
+        assert response.json()["success"] is True
+
+    def test_approve_failure(self, client, api_mocks):
+        api_mocks.apply_update.return_value = {"success": False, "error": "File not found"}
+
+        response = client.post("/approve", json={
+            "proposal": {"target_summary_id": "nonexistent", "source_entry_id": "test-entry"}
+        })
+        assert response.status_code == 200
+        assert response.json()["success"] is False
 
 
 class TestChangelogEndpoint:
     """Tests for the /changelog endpoint."""
 
-    def test_changelog_returns_changes(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        import api
-        from diff_engine import Changelog
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            changelog_path = Path(tmpdir) / "changelog.jsonl"
-
-            with TestClient(app) as client:
-                old_changelog = api.changelog
-                api.changelog = Changelog(changelog_path)
-                api.changelog.append([
-                    {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "test.field", "source": "test.yaml"},
-                    {"timestamp": "2024-01-15T13:00:00Z", "type": "modified", "path": "test.other", "source": "test.yaml"},
-                ])
-
-                try:
-                    response = client.get("/changelog")
-                    assert response.status_code == 200
-                    data = response.json()
-                    assert len(data["changes"]) == 2
-                    assert data["total"] == 2
-                finally:
-                    api.changelog = old_changelog
-
-    def test_changelog_filter_by_type(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        import api
-        from diff_engine import Changelog
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            changelog_path = Path(tmpdir) / "changelog.jsonl"
-
-            with TestClient(app) as client:
-                old_changelog = api.changelog
-                api.changelog = Changelog(changelog_path)
-                api.changelog.append([
-                    {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "a"},
-                    {"timestamp": "2024-01-15T12:00:00Z", "type": "modified", "path": "b"},
-                    {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "c"},
-                ])
-
-                try:
-                    response = client.get("/changelog?change_type=added")
-                    assert response.status_code == 200
-                    assert len(response.json()["changes"]) == 2
-                finally:
-                    api.changelog = old_changelog
-
-    def test_changelog_invalid_change_type(self):
-        from fastapi.testclient import TestClient
-        from api import app
-
-        with TestClient(app) as client:
-            response = client.get("/changelog?change_type=invalid")
-            assert response.status_code == 400
+    def test_changelog_returns_changes(self, client, api_changelog):
+        api_changelog.append([
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "test.field", "source": "test.yaml"},
+            {"timestamp": "2024-01-15T13:00:00Z", "type": "modified", "path": "test.other", "source": "test.yaml"},
+        ])
+
+        response = client.get("/changelog")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["changes"]) == 2
+        assert data["total"] == 2
+
+    def test_changelog_filter_by_type(self, client, api_changelog):
+        api_changelog.append([
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "a"},
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "modified", "path": "b"},
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "c"},
+        ])
+
+        response = client.get("/changelog?change_type=added")
+        assert response.status_code == 200
+        assert len(response.json()["changes"]) == 2
+
+    def test_changelog_invalid_change_type(self, client):
+        response = client.get("/changelog?change_type=invalid")
+        assert response.status_code == 400
 
 
 class TestChangelogSourcesEndpoint:
-    def test_changelog_sources_returns_unique_sources(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        import api
-        from diff_engine import Changelog
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with TestClient(app) as client:
-                old_changelog = api.changelog
-                api.changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-                api.changelog.append([
-                    {"timestamp": "2024-01-15T12:00:00Z", "source": "a.yaml", "path": "x"},
-                    {"timestamp": "2024-01-15T12:00:00Z", "source": "b.yaml", "path": "y"},
-                    {"timestamp": "2024-01-15T12:00:00Z", "source": "a.yaml", "path": "z"},
-                ])
-
-                try:
-                    response = client.get("/changelog/sources")
-                    assert response.status_code == 200
-                    assert sorted(response.json()["sources"]) == ["a.yaml", "b.yaml"]
-                finally:
-                    api.changelog = old_changelog
+    def test_changelog_sources_returns_unique_sources(self, client, api_changelog):
+        api_changelog.append([
+            {"timestamp": "2024-01-15T12:00:00Z", "source": "a.yaml", "path": "x"},
+            {"timestamp": "2024-01-15T12:00:00Z", "source": "b.yaml", "path": "y"},
+            {"timestamp": "2024-01-15T12:00:00Z", "source": "a.yaml", "path": "z"},
+        ])
+
+        response = client.get("/changelog/sources")
+        assert response.status_code == 200
+        assert response.json() == {"sources": ["a.yaml", "b.yaml"]}
 
 
 class TestChangelogStatsEndpoint:
-    def test_changelog_stats_returns_statistics(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        import api
-        from diff_engine import Changelog
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with TestClient(app) as client:
-                old_changelog = api.changelog
-                api.changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-                api._stats_cache = None
-                api._stats_cache_file_info = None
-                api.changelog.append([
-                    {"timestamp": "2024-01-15T10:00:00Z", "type": "added", "path": "a"},
-                    {"timestamp": "2024-01-15T11:00:00Z", "type": "modified", "path": "b"},
-                    {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "c"},
-                ])
-
-                try:
-                    response = client.get("/changelog/stats")
-                    assert response.status_code == 200
-                    data = response.json()
-                    assert data["total_changes"] == 3
-                    assert data["by_type"]["added"] == 2
-                finally:
-                    api.changelog = old_changelog
+    def test_changelog_stats_returns_statistics(self, client, api_changelog, monkeypatch):
+        expected = {
+            "total_changes": 3,
+            "by_type": {"added": 2, "modified": 1, "removed": 0},
+            "first_change": "2024-01-15T10:00:00Z",
+            "last_change": "2024-01-15T12:00:00Z",
+        }
+
+        monkeypatch.setattr(api, "_stats_cache", None)
+        monkeypatch.setattr(api, "_stats_cache_file_info", None)
+        api_changelog.append([
+            {"timestamp": "2024-01-15T10:00:00Z", "type": "added", "path": "a"},
+            {"timestamp": "2024-01-15T11:00:00Z", "type": "modified", "path": "b"},
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "c"},
+        ])
+
+        response = client.get("/changelog/stats")
+        assert response.status_code == 200
+        assert response.json() == expected
 
 
 class TestEntryHistoryEndpoint:
-    def test_entry_history_returns_changes(self):
-        from fastapi.testclient import TestClient
-        from api import app
-        import api
-        from diff_engine import Changelog
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with TestClient(app) as client:
-                old_changelog = api.changelog
-                api.changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-                api.entries_cache["test-entry"] = {
-                    "id": "test-entry", "content": "Test",
-                    "metadata": {"type": "entry", "file_path": "entries/test-entry.yaml"},
-                }
-                api.changelog.append([
-                    {"timestamp": "2024-01-15T12:00:00Z", "source": "entries/test-entry.yaml", "path": "field1", "type": "added"},
-                    {"timestamp": "2024-01-15T13:00:00Z", "source": "entries/test-entry.yaml", "path": "field2", "type": "modified"},
-                    {"timestamp": "2024-01-15T14:00:00Z", "source": "entries/other.yaml", "path": "field3", "type": "added"},
-                ])
-
-                try:
-                    response = client.get("/entries/test-entry/history")
-                    assert response.status_code == 200
-                    data = response.json()
-                    assert len(data["changes"]) == 2
-                    assert data["total"] == 2
-                finally:
-                    api.changelog = old_changelog
-                    api.entries_cache.pop("test-entry", None)
-
-    def test_entry_history_respects_limit(self):
+    def test_entry_history_returns_changes(self, client, api_changelog):
+        api.entries_cache["test-entry"] = {
+            "id": "test-entry", "content": "Test",
+            "metadata": {"type": "entry", "file_path": "entries/test-entry.yaml"},
+        }
+        api_changelog.append([
+            {"timestamp": "2024-01-15T12:00:00Z", "source": "entries/test-entry.yaml", "path": "field1", "type": "added"},
+            {"timestamp": "2024-01-15T13:00:00Z", "source": "entries/test-entry.yaml", "path": "field2", "type": "modified"},
+            {"timestamp": "2024-01-15T14:00:00Z", "source": "entries/other.yaml", "path": "field3", "type": "added"},
+        ])
+
+        response = client.get("/entries/test-entry/history")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["changes"]) == 2
+        assert data["total"] == 2
+
+    def test_entry_history_respects_limit(self, client, api_changelog):
         """Should respect the limit parameter."""
-        from fastapi.testclient import TestClient
-        from api import app
-        import api
-        from diff_engine import Changelog
-        from pathlib import Path
-
-        with tempfile.TemporaryDirectory() as tmpdir:
-            with TestClient(app) as client:
-                old_changelog = api.changelog
-                api.changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-                api.entries_cache["test-entry"] = {
-                    "id": "test-entry", "content": "Test",
-                    "metadata": {"type": "entry", "file_path": "entries/test-entry.yaml"},
-                }
-                changes = [
-                    {"timestamp": f"2024-01-15T{10+i:02d}:00:00Z", "source": "entries/test-entry.yaml", "path": f"field{i}", "type": "added"}
-                    for i in range(10)
-                ]
-                api.changelog.append(changes)
-
-                try:
-                    response = client.get("/entries/test-entry/history?limit=3")
-                    assert response.status_code == 200
-                    data = response.json()
-                    assert len(data["changes"]) == 3
-                    assert data["total"] == 10
-                finally:
-                    api.changelog = old_changelog
-                    api.entries_cache.pop("test-entry", None)
+        api.entries_cache["test-entry"] = {
+            "id": "test-entry", "content": "Test",
+            "metadata": {"type": "entry", "file_path": "entries/test-entry.yaml"},
+        }
+        changes = [
+            {"timestamp": f"2024-01-15T{10+i:02d}:00:00Z", "source": "entries/test-entry.yaml", "path": f"field{i}", "type": "added"}
+            for i in range(10)
+        ]
+        api_changelog.append(changes)
+
+        response = client.get("/entries/test-entry/history?limit=3")
+        assert response.status_code == 200
+        data = response.json()
+        assert len(data["changes"]) == 3
+        assert data["total"] == 10
@@ -2,10 +2,12 @@
 Tests for the diff engine module.
 """
 
-import tempfile
-from pathlib import Path
+import math
 from datetime import datetime
 
+import pytest
+
+import jsonutil
 from diff_engine import (
     flatten_to_nodes,
     get_node_value,
@@ -17,223 +19,135 @@ from diff_engine import (
 )
 
 
-class TestFlattenToNodes:
-    """Tests for flatten_to_nodes function."""
+# (data, expected nodes) for flatten_to_nodes
+FLATTEN_CASES = [
+    pytest.param({"foo": "bar", "baz": 123}, {"foo": "bar", "baz": 123}, id="simple_dict"),
+    pytest.param({"foo": {"bar": "value", "baz": 456}}, {"foo.bar": "value", "foo.baz": 456}, id="nested_dict"),
+    pytest.param({"items": ["a", "b", "c"]}, {"items[0]": "a", "items[1]": "b", "items[2]": "c"}, id="array"),
+    pytest.param(
+        {"users": [{"name": "Alice"}, {"name": "Bob"}]},
+        {"users[0].name": "Alice", "users[1].name": "Bob"},
+        id="nested_array_of_dicts",
+    ),
+    pytest.param({"a": {"b": {"c": {"d": "deep"}}}}, {"a.b.c.d": "deep"}, id="deeply_nested"),
+    pytest.param({}, {}, id="empty_dict"),
+    # Empty dicts/arrays are preserved as leaf values
+    pytest.param({"empty_dict": {}, "empty_list": []}, {"empty_dict": {}, "empty_list": []}, id="empty_nested_values"),
+    pytest.param({"foo": None, "bar": "value"}, {"foo": None, "bar": "value"}, id="null_values"),
+]
+
+# (data, path, expected (found, value)) for get_node_value
+GET_NODE_VALUE_CASES = [
+    pytest.param({"foo": "bar"}, "foo", (True, "bar"), id="simple_path"),
+    pytest.param({"foo": {"bar": {"baz": 123}}}, "foo.bar.baz", (True, 123), id="nested_path"),
+    pytest.param({"items": ["a", "b", "c"]}, "items[1]", (True, "b"), id="array_index"),
+    pytest.param({"users": [{"name": "Alice"}, {"name": "Bob"}]}, "users[1].name", (True, "Bob"), id="nested_array"),
+    pytest.param({"foo": "bar"}, "baz", (False, None), id="missing_path"),
+    pytest.param({"items": ["a"]}, "items[5]", (False, None), id="out_of_bounds_index"),
+    # Empty path returns the whole document
+    pytest.param({"foo": "bar"}, "", (True, {"foo": "bar"}), id="empty_path"),
+]
+
+
+# (old_data, new_data, expected changes minus timestamp/source) for compute_diff
+COMPUTE_DIFF_CASES = [
+    pytest.param(
+        None, {"id": "test", "topic": "Test Topic"},
+        [
+            {"type": ChangeType.ADDED, "path": "id", "value": "test"},
+            {"type": ChangeType.ADDED, "path": "topic", "value": "Test Topic"},
+        ],
+        id="new_document",
+    ),
+    pytest.param(
+        {"id": "test"}, {"id": "test", "topic": "New Topic"},
+        [{"type": ChangeType.ADDED, "path": "topic", "value": "New Topic"}],
+        id="field_added",
+    ),
+    pytest.param(
+        {"id": "test", "topic": "Topic"}, {"id": "test"},
+        [{"type": ChangeType.REMOVED, "path": "topic", "old": "Topic"}],
+        id="field_removed",
+    ),
+    pytest.param(
+        {"id": "test", "topic": "Old Topic"}, {"id": "test", "topic": "New Topic"},
+        [{"type": ChangeType.MODIFIED, "path": "topic", "old": "Old Topic", "new": "New Topic"}],
+        id="field_modified",
+    ),
+    pytest.param(
+        {"id": "test", "topic": "Topic"}, {"id": "test", "topic": "Topic"},
+        [],
+        id="no_changes",
+    ),
+    pytest.param(
+        {"meta": {"a": 1}}, {"meta": {"a": 1, "b": 2}},
+        [{"type": ChangeType.ADDED, "path": "meta.b", "value": 2}],
+        id="nested_field_added",
+    ),
+    pytest.param(
+        {"tags": ["a", "b"]}, {"tags": ["a", "b", "c"]},
+        [{"type": ChangeType.ADDED, "path": "tags[2]", "value": "c"}],
+        id="array_item_added",
+    ),
+    pytest.param(
+        {"tags": ["a", "b"]}, {"tags": ["a", "B"]},
+        [{"type": ChangeType.MODIFIED, "path": "tags[1]", "old": "b", "new": "B"}],
+        id="array_item_modified",
+    ),
+    pytest.param(
+        {"tags": ["a", "b", "c"]}, {"tags": ["a", "b"]},
+        [{"type": ChangeType.REMOVED, "path": "tags[2]", "old": "c"}],
+        id="array_item_removed",
+    ),
+]
 
-    def test_simple_dict(self):
-        """Should flatten simple dict to paths."""
-        data = {"foo": "bar", "baz": 123}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {"foo": "bar", "baz": 123}
 
-    def test_nested_dict(self):
-        """Should flatten nested dict with dot notation."""
-        data = {"foo": {"bar": "value", "baz": 456}}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {"foo.bar": "value", "foo.baz": 456}
-
-    def test_array(self):
-        """Should flatten array with bracket notation."""
-        data = {"items": ["a", "b", "c"]}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {"items[0]": "a", "items[1]": "b", "items[2]": "c"}
+class TestFlattenToNodes:
+    """Tests for flatten_to_nodes function."""
 
-    def test_nested_array_of_dicts(self):
-        """Should flatten array of dicts."""
-        data = {"users": [{"name": "Alice"}, {"name": "Bob"}]}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {"users[0].name": "Alice", "users[1].name": "Bob"}
+    @pytest.mark.parametrize("data,expected", FLATTEN_CASES)
+    def test_flatten(self, data, expected):
+        """Should flatten to dot/bracket paths."""
+        assert flatten_to_nodes(data) == expected
 
-    def test_deeply_nested(self):
-        """Should handle deeply nested structures."""
-        data = {"a": {"b": {"c": {"d": "deep"}}}}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {"a.b.c.d": "deep"}
+    def test_deeper_than_recursion_limit(self):
+        """Should flatten documents nested past Python's recursion limit."""
+        data = current = {}
+        for _ in range(2000):
+            current["n"] = {}
+            current = current["n"]
+        current["leaf"] = 1
 
-    def test_empty_dict(self):
-        """Should handle empty dict."""
-        data = {}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {}
-
-    def test_empty_nested_values(self):
-        """Should preserve empty dicts/arrays as leaf values."""
-        data = {"empty_dict": {}, "empty_list": []}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {"empty_dict": {}, "empty_list": []}
-
-    def test_null_values(self):
-        """Should handle null values."""
-        data = {"foo": None, "bar": "value"}
-        nodes = flatten_to_nodes(data)
-        
-        assert nodes == {"foo": None, "bar": "value"}
+        assert flatten_to_nodes(data) == {".".join(["n"] * 2000) + ".leaf": 1}
 
 
 class TestGetNodeValue:
     """Tests for get_node_value function."""
 
-    def test_simple_path(self):
-        """Should get value at simple path."""
-        data = {"foo": "bar"}
-        found, value = get_node_value(data, "foo")
-        
-        assert found is True
-        assert value == "bar"
-
-    def test_nested_path(self):
-        """Should get value at nested path."""
-        data = {"foo": {"bar": {"baz": 123}}}
-        found, value = get_node_value(data, "foo.bar.baz")
-        
-        assert found is True
-        assert value == 123
-
-    def test_array_index(self):
-        """Should get value at array index."""
-        data = {"items": ["a", "b", "c"]}
-        found, value = get_node_value(data, "items[1]")
-        
-        assert found is True
-        assert value == "b"
-
-    def test_nested_array(self):
-        """Should get value in nested array."""
-        data = {"users": [{"name": "Alice"}, {"name": "Bob"}]}
-        found, value = get_node_value(data, "users[1].name")
-        
-        assert found is True
-        assert value == "Bob"
-
-    def test_missing_path(self):
-        """Should return not found for missing path."""
-        data = {"foo": "bar"}
-        found, value = get_node_value(data, "baz")
-        
-        assert found is False
-        assert value is None
-
-    def test_out_of_bounds_index(self):
-        """Should return not found for out of bounds index."""
-        data = {"items": ["a"]}
-        found, value = get_node_value(data, "items[5]")
-        
-        assert found is False
-        assert value is None
+    @pytest.mark.parametrize("data,path,expected", GET_NODE_VALUE_CASES)
+    def test_get_node_value(self, data, path, expected):
+        """Should return (found, value) for the path."""
+        assert get_node_value(data, path) == expected
 
-    def test_empty_path(self):
-        """Should return whole data for empty path."""
-        data = {"foo": "bar"}
-        found, value = get_node_value(data, "")
-        
-        assert found is True
-        assert value == data
+    @pytest.mark.parametrize("path", ["items[x]", "items[0"])
+    def test_malformed_index_raises(self, path):
+        """Should reject bracket indexes that aren't closed integers."""
+        with pytest.raises(ValueError, match="Invalid path"):
+            get_node_value({"items": ["a"]}, path)
 
 
 class TestComputeDiff:
     """Tests for compute_diff function."""
 
-    def test_new_document(self):
-        """Should detect all fields as added for new document."""
-        new_data = {"id": "test", "topic": "Test Topic"}
-        changes = compute_diff(None, new_data, "test.yaml")
-        
-        assert len(changes) == 2
-        assert all(c["type"] == ChangeType.ADDED for c in changes)
-        paths = {c["path"] for c in changes}
-        assert paths == {"id", "topic"}
-
-    def test_field_added(self):
-        """Should detect added field."""
-        old_data = {"id": "test"}
-        new_data = {"id": "test", "topic": "New Topic"}
+    @pytest.mark.parametrize("old_data,new_data,expected", COMPUTE_DIFF_CASES)
+    def test_compute_diff(self, old_data, new_data, expected):
+        """Should report each changed leaf, ordered by path."""
         changes = compute_diff(old_data, new_data, "test.yaml")
-        
-        assert len(changes) == 1
-        assert changes[0]["type"] == ChangeType.ADDED
-        assert changes[0]["path"] == "topic"
-        assert changes[0]["value"] == "New Topic"
-
-    def test_field_removed(self):
-        """Should detect removed field."""
-        old_data = {"id": "test", "topic": "Topic"}
-        new_data = {"id": "test"}
-        changes = compute_diff(old_data, new_data, "test.yaml")
-        
-        assert len(changes) == 1
-        assert changes[0]["type"] == ChangeType.REMOVED
-        assert changes[0]["path"] == "topic"
-        assert changes[0]["old"] == "Topic"
-
-    def test_field_modified(self):
-        """Should detect modified field."""
-        old_data = {"id": "test", "topic": "Old Topic"}
-        new_data = {"id": "test", "topic": "New Topic"}
-        changes = compute_diff(old_data, new_data, "test.yaml")
-        
-        assert len(changes) == 1
-        assert changes[0]["type"] == ChangeType.MODIFIED
-        assert changes[0]["path"] == "topic"
-        assert changes[0]["old"] == "Old Topic"
-        assert changes[0]["new"] == "New Topic"
-
-    def test_no_changes(self):
-        """Should return empty list when no changes."""
-        data = {"id": "test", "topic": "Topic"}
-        changes = compute_diff(data.copy(), data.copy(), "test.yaml")
-        
-        assert len(changes) == 0
-
-    def test_nested_field_added(self):
-        """Should detect added nested field."""
-        old_data = {"meta": {"a": 1}}
-        new_data = {"meta": {"a": 1, "b": 2}}
-        changes = compute_diff(old_data, new_data, "test.yaml")
-        
-        assert len(changes) == 1
-        assert changes[0]["path"] == "meta.b"
-        assert changes[0]["type"] == ChangeType.ADDED
 
-    def test_array_item_added(self):
-        """Should detect added array item."""
-        old_data = {"tags": ["a", "b"]}
-        new_data = {"tags": ["a", "b", "c"]}
-        changes = compute_diff(old_data, new_data, "test.yaml")
-        
-        assert len(changes) == 1
-        assert changes[0]["path"] == "tags[2]"
-        assert changes[0]["type"] == ChangeType.ADDED
-        assert changes[0]["value"] == "c"
-
-    def test_array_item_modified(self):
-        """Should detect modified array item."""
-        old_data = {"tags": ["a", "b"]}
-        new_data = {"tags": ["a", "B"]}
-        changes = compute_diff(old_data, new_data, "test.yaml")
-        
-        assert len(changes) == 1
-        assert changes[0]["path"] == "tags[1]"
-        assert changes[0]["type"] == ChangeType.MODIFIED
-        assert changes[0]["old"] == "b"
-        assert changes[0]["new"] == "B"
-
-    def test_array_item_removed(self):
-        """Should detect removed array item."""
-        old_data = {"tags": ["a", "b", "c"]}
-        new_data = {"tags": ["a", "b"]}
-        changes = compute_diff(old_data, new_data, "test.yaml")
-        
-        assert len(changes) == 1
-        assert changes[0]["path"] == "tags[2]"
-        assert changes[0]["type"] == ChangeType.REMOVED
-        assert changes[0]["old"] == "c"
+        assert [
+            {k: v for k, v in c.items() if k not in ("timestamp", "source")}
+            for c in changes
+        ] == expected
 
     def test_timestamp_format(self):
         """Should include ISO timestamp in changes."""
@@ -249,263 +163,234 @@ class TestComputeDiff:
         assert changes[0]["source"] == "path/to/test.yaml"
 
 
+@pytest.fixture(scope="session")
+def _session_changelog(tmp_path_factory):
+    """One Changelog (and file) for the whole session."""
+    return Changelog(tmp_path_factory.mktemp("changelog") / "changelog.jsonl")
+
+
+@pytest.fixture
+def changelog(_session_changelog):
+    """The session Changelog, truncated so each test starts empty."""
+    _session_changelog.path.write_text("")
+    return _session_changelog
+
+
+@pytest.fixture(scope="session")
+def seeded_changelog(tmp_path_factory):
+    """Read-only Changelog, written once, that the read-path tests query."""
+    changelog = Changelog(tmp_path_factory.mktemp("seeded") / "changelog.jsonl")
+    changelog.append([
+        {"timestamp": "2024-01-10T12:00:00Z", "source": "a.yaml", "type": "added", "path": "foo.bar"},
+        {"timestamp": "2024-01-15T11:00:00Z", "source": "b.yaml", "type": "modified", "path": "foo.baz"},
+        {"timestamp": "2024-01-15T12:00:00Z", "source": "b.yaml", "type": "added", "path": "other"},
+        {"timestamp": "2024-01-20T12:00:00Z", "source": "c.yaml", "type": "removed", "path": "late"},
+    ])
+    return changelog
+
+
 class TestChangelog:
     """Tests for Changelog class."""
 
-    def test_create_file(self):
+    def test_create_file(self, tmp_path):
         """Should create changelog file if not exists."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            Changelog(path)
-            
-            assert path.exists()
+        path = tmp_path / "changelog.jsonl"
+        Changelog(path)
 
-    def test_append_changes(self):
+        assert path.exists()
+
+    def test_append_changes(self, changelog):
         """Should append changes to file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changes = [
-                {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "foo"}
-            ]
-            changelog.append(changes)
-            
-            content = path.read_text()
-            assert "foo" in content
-
-    def test_read_all(self):
-        """Should read all changes from file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "a"},
-                {"timestamp": "2024-01-15T12:01:00Z", "type": "added", "path": "b"},
-            ])
-            
-            all_changes = changelog.read_all()
-            assert len(all_changes) == 2
-
-    def test_read_recent(self):
+        changes = [
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "foo"}
+        ]
+        changelog.append(changes)
+
+        content = changelog.path.read_text()
+        assert "foo" in content
+
+    def test_append_after_rotation(self, tmp_path):
+        """Should write to the file now at the path, not a rotated-away one."""
+        changelog = Changelog(tmp_path / "changelog.jsonl")
+        changelog.append([{"timestamp": "2024-01-15T12:00:00Z", "path": "a"}])
+        changelog.path.rename(tmp_path / "changelog.jsonl.1")
+        changelog.path.touch()
+        changelog.append([{"timestamp": "2024-01-15T12:01:00Z", "path": "b"}])
+
+        assert [c["path"] for c in changelog.read_all()] == ["b"]
+
+    def test_append_without_orjson(self, changelog, monkeypatch):
+        """Should fall back to stdlib json when orjson isn't installed."""
+        monkeypatch.setattr(jsonutil, "orjson", None)
+
+        changelog.append([
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "café", "new": 1.5}
+        ])
+
+        assert changelog.read_all() == [
+            {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "café", "new": 1.5}
+        ]
+
+    def test_round_trips_nan_and_big_ints(self, changelog):
+        """Should keep values orjson can't represent (NaN, >64-bit ints) intact."""
+        changelog.append([
+            {"timestamp": "2024-01-15T12:00:00Z", "path": "nan", "new": float("nan")},
+            {"timestamp": "2024-01-15T12:00:00Z", "path": "big", "new": 2**70},
+        ])
+
+        nan_change, big_change = changelog.read_all()
+        assert math.isnan(nan_change["new"])
+        assert big_change["new"] == 2**70
+
+    def test_read_all(self, seeded_changelog):
+        """Should read all changes from file, oldest first."""
+        all_changes = seeded_changelog.read_all()
+        assert [c["path"] for c in all_changes] == ["foo.bar", "foo.baz", "other", "late"]
+
+    def test_read_recent(self, seeded_changelog):
         """Should read recent changes in descending order."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-15T10:00:00Z", "type": "added", "path": "old"},
-                {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "new"},
-            ])
-            
-            recent = changelog.read_recent(limit=1)
-            assert len(recent) == 1
-            assert recent[0]["path"] == "new"
-
-    def test_read_by_source(self):
-        """Should filter changes by source."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-15T12:00:00Z", "source": "a.yaml", "path": "x"},
-                {"timestamp": "2024-01-15T12:00:00Z", "source": "b.yaml", "path": "y"},
-            ])
-            
-            filtered = changelog.read_by_source("a.yaml")
-            assert len(filtered) == 1
-            assert filtered[0]["path"] == "x"
-
-    def test_read_by_path(self):
-        """Should filter changes by path prefix."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-15T12:00:00Z", "path": "foo.bar"},
-                {"timestamp": "2024-01-15T12:00:00Z", "path": "foo.baz"},
-                {"timestamp": "2024-01-15T12:00:00Z", "path": "other"},
-            ])
-            
-            filtered = changelog.read_by_path("foo")
-            assert len(filtered) == 2
-
-    def test_read_by_type(self):
-        """Should filter changes by type."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "a"},
-                {"timestamp": "2024-01-15T12:00:00Z", "type": "modified", "path": "b"},
-                {"timestamp": "2024-01-15T12:00:00Z", "type": "added", "path": "c"},
-            ])
-            
-            filtered = changelog.read_by_type("added")
-            assert len(filtered) == 2
-
-    def test_read_by_date_range_both_bounds(self):
-        """Should filter changes within start and end date range."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-10T12:00:00Z", "path": "early"},
-                {"timestamp": "2024-01-15T12:00:00Z", "path": "middle"},
-                {"timestamp": "2024-01-20T12:00:00Z", "path": "late"},
-            ])
-            
-            start = datetime(2024, 1, 14, 0, 0, 0)
-            end = datetime(2024, 1, 16, 0, 0, 0)
-            filtered = changelog.read_by_date_range(start, end)
-            
-            assert len(filtered) == 1
-            assert filtered[0]["path"] == "middle"
-
-    def test_read_by_date_range_start_only(self):
-        """Should filter changes from start date onwards when end is None."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-10T12:00:00Z", "path": "early"},
-                {"timestamp": "2024-01-15T12:00:00Z", "path": "middle"},
-                {"timestamp": "2024-01-20T12:00:00Z", "path": "late"},
-            ])
-            
-            start = datetime(2024, 1, 14, 0, 0, 0)
-            filtered = changelog.read_by_date_range(start=start, end=None)
-            
-            assert len(filtered) == 2
-            assert filtered[0]["path"] == "late"  # newest first
-            assert filtered[1]["path"] == "middle"
-
-    def test_read_by_date_range_end_only(self):
-        """Should filter changes up to end date when start is None."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-10T12:00:00Z", "path": "early"},
-                {"timestamp": "2024-01-15T12:00:00Z", "path": "middle"},
-                {"timestamp": "2024-01-20T12:00:00Z", "path": "late"},
-            ])
-            
-            end = datetime(2024, 1, 16, 0, 0, 0)
-            filtered = changelog.read_by_date_range(start=None, end=end)
-            
-            assert len(filtered) == 2
-            assert filtered[0]["path"] == "middle"  # newest first
-            assert filtered[1]["path"] == "early"
-
-    def test_read_by_date_range_no_bounds(self):
-        """Should return all changes when both start and end are None."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            path = Path(tmpdir) / "changelog.jsonl"
-            changelog = Changelog(path)
-            
-            changelog.append([
-                {"timestamp": "2024-01-10T12:00:00Z", "path": "early"},
-                {"timestamp": "2024-01-15T12:00:00Z", "path": "middle"},
-                {"timestamp": "2024-01-20T12:00:00Z", "path": "late"},
-            ])
-            
-            filtered = changelog.read_by_date_range(start=None, end=None)
-            
-            assert len(filtered) == 3
+        recent = seeded_changelog.read_recent(limit=2)
+        assert [c["path"] for c in recent] == ["late", "other"]
+
+    @pytest.mark.parametrize("method,arg,expected_paths", [
+        ("read_by_source", "a.yaml", ["foo.bar"]),
+        ("read_by_path", "foo", ["foo.baz", "foo.bar"]),
+        ("read_by_path", ("foo.bar", "late"), ["late", "foo.bar"]),
+        ("read_by_type", "added", ["other", "foo.bar"]),
+    ])
+    def test_read_filtered(self, seeded_changelog, method, arg, expected_paths):
+        """Should filter by source, path prefix or type, newest first."""
+        filtered = getattr(seeded_changelog, method)(arg)
+        assert [c["path"] for c in filtered] == expected_paths
+
+    @pytest.mark.parametrize("start,end,expected_paths", [
+        pytest.param(datetime(2024, 1, 14), datetime(2024, 1, 16), ["other", "foo.baz"], id="both_bounds"),
+        pytest.param(datetime(2024, 1, 14), None, ["late", "other", "foo.baz"], id="start_only"),
+        pytest.param(None, datetime(2024, 1, 16), ["other", "foo.baz", "foo.bar"], id="end_only"),
+        pytest.param(None, None, ["late", "other", "foo.baz", "foo.bar"], id="no_bounds"),
+    ])
+    def test_read_by_date_range(self, seeded_changelog, start, end, expected_paths):
+        """Should return changes inside the (inclusive, optional) bounds, newest first."""
+        filtered = seeded_changelog.read_by_date_range(start=start, end=end)
+        assert [c["path"] for c in filtered] == expected_paths
 
 
 class TestVersionCache:
     """Tests for VersionCache class."""
 
-    def test_create_directory(self):
+    def test_create_directory(self, tmp_path):
         """Should create cache directory if not exists."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cache_dir = Path(tmpdir) / "cache"
-            VersionCache(cache_dir)
-            
-            assert cache_dir.exists()
+        cache_dir = tmp_path / "cache"
+        VersionCache(cache_dir)
+
+        assert cache_dir.exists()
 
-    def test_get_previous_empty(self):
+    def test_get_previous_empty(self, tmp_path):
         """Should return None when no previous version."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cache = VersionCache(tmpdir)
-            
-            result = cache.get_previous("nonexistent.yaml")
-            assert result is None
+        cache = VersionCache(tmp_path)
+
+        result = cache.get_previous("nonexistent.yaml")
+        assert result is None
 
-    def test_save_and_get(self):
+    def test_save_and_get(self, tmp_path):
         """Should save and retrieve previous version."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cache = VersionCache(tmpdir)
-            
-            data = {"id": "test", "topic": "Test"}
-            cache.save_current("entry.yaml", data)
-            
-            result = cache.get_previous("entry.yaml")
-            assert result == data
+        cache = VersionCache(tmp_path)
+
+        data = {"id": "test", "topic": "Test"}
+        cache.save_current("entry.yaml", data)
+
+        result = cache.get_previous("entry.yaml")
+        assert result == data
+
+
+class InMemoryChangelog:
+    """Changelog stand-in that keeps appended records in a list."""
+
+    def __init__(self):
+        self.records = []
+
+    def append(self, changes):
+        self.records.extend(changes)
+        return len(changes)
+
+
+class InMemoryVersionCache:
+    """VersionCache stand-in backed by a dict."""
+
+    def __init__(self):
+        self.versions = {}
+
+    def get_previous(self, source_file):
+        return self.versions.get(source_file)
+
+    def save_current(self, source_file, data):
+        self.versions[source_file] = data
 
 
 class TestDiffAndLog:
-    """Tests for diff_and_log function."""
+    """Tests for diff_and_log function.
+
+    These cover the orchestration with in-memory fakes; persistence is
+    exercised once, in test_persists_to_disk.
+    """
 
     def test_new_document_logged(self):
         """Should log all fields for new document."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-            version_cache = VersionCache(Path(tmpdir) / "cache")
-            
-            new_data = {"id": "test", "topic": "Topic"}
-            changes = diff_and_log("test.yaml", new_data, changelog, version_cache)
-            
-            assert len(changes) == 2
-            assert all(c["type"] == "added" for c in changes)
+        changelog = InMemoryChangelog()
+
+        new_data = {"id": "test", "topic": "Topic"}
+        changes = diff_and_log("test.yaml", new_data, changelog, InMemoryVersionCache())
+
+        assert len(changes) == 2
+        assert all(c["type"] == "added" for c in changes)
+        assert changelog.records == changes
 
     def test_subsequent_changes_logged(self):
         """Should log only changed fields on update."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-            version_cache = VersionCache(Path(tmpdir) / "cache")
-            
-            # First version
-            v1 = {"id": "test", "topic": "Topic 1"}
-            diff_and_log("test.yaml", v1, changelog, version_cache)
-            
-            # Second version
-            v2 = {"id": "test", "topic": "Topic 2"}
-            changes = diff_and_log("test.yaml", v2, changelog, version_cache)
-            
-            assert len(changes) == 1
-            assert changes[0]["type"] == "modified"
-            assert changes[0]["path"] == "topic"
+        changelog = InMemoryChangelog()
+        version_cache = InMemoryVersionCache()
+
+        # First version
+        v1 = {"id": "test", "topic": "Topic 1"}
+        diff_and_log("test.yaml", v1, changelog, version_cache)
+
+        # Second version
+        v2 = {"id": "test", "topic": "Topic 2"}
+        changes = diff_and_log("test.yaml", v2, changelog, version_cache)
+
+        assert len(changes) == 1
+        assert changes[0]["type"] == "modified"
+        assert changes[0]["path"] == "topic"
+        assert len(changelog.records) == 3
 
     def test_no_changes_not_logged(self):
         """Should not log when no changes."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-            version_cache = VersionCache(Path(tmpdir) / "cache")
-            
-            data = {"id": "test", "topic": "Topic"}
-            diff_and_log("test.yaml", data, changelog, version_cache)
-            changes = diff_and_log("test.yaml", data.copy(), changelog, version_cache)
-            
-            assert len(changes) == 0
+        changelog = InMemoryChangelog()
+        version_cache = InMemoryVersionCache()
+
+        data = {"id": "test", "topic": "Topic"}
+        diff_and_log("test.yaml", data, changelog, version_cache)
+        changes = diff_and_log("test.yaml", data.copy(), changelog, version_cache)
+
+        assert len(changes) == 0
+        assert len(changelog.records) == 2
 
     def test_version_cache_updated(self):
         """Should update version cache after diff."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            changelog = Changelog(Path(tmpdir) / "changelog.jsonl")
-            version_cache = VersionCache(Path(tmpdir) / "cache")
-            
-            data = {"id": "test", "topic": "Topic"}
-            diff_and_log("test.yaml", data, changelog, version_cache)
-            
-            cached = version_cache.get_previous("test.yaml")
-            assert cached == data
+        version_cache = InMemoryVersionCache()
+
+        data = {"id": "test", "topic": "Topic"}
+        diff_and_log("test.yaml", data, InMemoryChangelog(), version_cache)
+
+        assert version_cache.get_previous("test.yaml") == data
+
+    def test_persists_to_disk(self, tmp_path):
+        """Should write changes to the JSONL file and the version snapshot."""
+        changelog = Changelog(tmp_path / "changelog.jsonl")
+        version_cache = VersionCache(tmp_path / "cache")
+
+        data = {"id": "test", "topic": "Topic"}
+        changes = diff_and_log("test.yaml", data, changelog, version_cache)
+
+        assert changelog.read_all() == changes
+        assert VersionCache(tmp_path / "cache").get_previous("test.yaml") == data
@@ -8,6 +8,12 @@ factory functions with sentinels.
 
 from __future__ import annotations
 
+import asyncio
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
 import numpy as np
 import pytest
 
@@ -27,6 +33,18 @@ async def test_mock_embedder_is_deterministic() -> None:
     assert not np.array_equal(v1, v3)
 
 
+async def test_mock_embedder_embed_many_matches_embed() -> None:
+    embed = embedders.mock_embedder()
+
+    texts = ["hello world", "different input", ""]
+    vectors = await embed.embed_many(texts)
+
+    assert len(vectors) == 3
+    for text, vec in zip(texts, vectors):
+        assert vec.dtype == np.float32
+        assert np.array_equal(vec, await embed(text))
+
+
 async def test_mock_embedder_custom_dim() -> None:
     embed = embedders.mock_embedder(dim=128)
     v = await embed("x")
@@ -97,3 +115,151 @@ def test_env_var_truthy_values(monkeypatch, truthy: str) -> None:
     monkeypatch.setattr(embedders, "mock_embedder", lambda: sentinel)
 
     assert embedders.select_embedder() is sentinel
+
+
+@pytest.fixture
+def fake_sentence_transformers(monkeypatch):
+    """Install a stand-in `sentence_transformers` module and reset the
+    embedder cache around the test so the fake model isn't reused."""
+
+    def install(model_cls):
+        monkeypatch.setitem(
+            sys.modules, "sentence_transformers", SimpleNamespace(SentenceTransformer=model_cls)
+        )
+
+    embedders._sentence_transformer_embedder.cache_clear()
+    yield install
+    embedders._sentence_transformer_embedder.cache_clear()
+
+
+def test_sentence_transformer_model_loads_once(fake_sentence_transformers) -> None:
+    loaded = []
+
+    class FakeModel:
+        def __init__(self, model_name):
+            loaded.append(model_name)
+
+    fake_sentence_transformers(FakeModel)
+
+    first = embedders.sentence_transformer_embedder()
+    assert embedders.sentence_transformer_embedder() is first
+    embedders.sentence_transformer_embedder("other-model")
+
+    assert loaded == ["sentence-transformers/all-MiniLM-L6-v2", "other-model"]
+
+
+async def test_sentence_transformer_embed_many_encodes_once(fake_sentence_transformers) -> None:
+    encode_calls = []
+
+    class FakeModel:
+        def __init__(self, model_name):
+            pass
+
+        def encode(self, texts, **kwargs):
+            encode_calls.append(texts)
+            if isinstance(texts, str):
+                return np.ones(3, dtype=np.float64)
+            return np.ones((len(texts), 3), dtype=np.float64)
+
+    fake_sentence_transformers(FakeModel)
+    embed = embedders.sentence_transformer_embedder()
+
+    vectors = await embed.embed_many(["a", "b", "c"])
+
+    assert encode_calls == [["a", "b", "c"]]
+    assert len(vectors) == 3
+    assert all(v.dtype == np.float32 and v.shape == (3,) for v in vectors)
+
+
+async def test_openai_embed_many_sends_batches_concurrently(monkeypatch) -> None:
+    in_flight = 0
+    peak = 0
+
+    class FakeEmbeddings:
+        async def create(self, model, input):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0)
+            in_flight -= 1
+            return SimpleNamespace(
+                data=[SimpleNamespace(embedding=[float(len(t))]) for t in input]
+            )
+
+    monkeypatch.setitem(
+        sys.modules,
+        "openai",
+        SimpleNamespace(AsyncOpenAI=lambda api_key: SimpleNamespace(embeddings=FakeEmbeddings())),
+    )
+    monkeypatch.setattr(embedders, "OPENAI_BATCH_SIZE", 2)
+    embed = embedders.openai_embedder("sk-test")
+
+    texts = ["a" * n for n in range(1, 8)]
+    vectors = await embed.embed_many(texts)
+
+    assert [v.tolist() for v in vectors] == [[float(n)] for n in range(1, 8)]
+    assert peak == 4  # 4 batches of <= 2 texts, all in flight together
+
+
+async def test_disk_cached_embedder_persists_across_instances(tmp_path) -> None:
+    calls: list[str] = []
+    base = embedders.mock_embedder()
+
+    async def embed(text: str) -> np.ndarray:
+        calls.append(text)
+        return await base(text)
+
+    db_path = str(tmp_path / "embedding_cache.db")
+    first = embedders.disk_cached_embedder(embed, db_path, "model-a")
+    v1 = await first("hello")
+    first.close()
+
+    second = embedders.disk_cached_embedder(embed, db_path, "model-a")
+    v2 = await second("hello")
+    second.close()
+    other_model = embedders.disk_cached_embedder(embed, db_path, "model-b")
+    await other_model("hello")
+    other_model.close()
+
+    assert np.array_equal(v1, v2)
+    assert calls == ["hello", "hello"]  # once per model
+
+
+async def test_disk_cached_embedder_batches_only_misses(tmp_path) -> None:
+    batches: list[list[str]] = []
+    base = embedders.mock_embedder()
+
+    async def embed(text: str) -> np.ndarray:
+        return await base(text)
+
+    async def embed_many(texts: list[str]) -> list[np.ndarray]:
+        batches.append(list(texts))
+        return [await base(t) for t in texts]
+
+    embed.embed_many = embed_many
+    cached = embedders.disk_cached_embedder(embed, str(tmp_path / "cache.db"), "model-a")
+
+    await cached.embed_many(["a", "b"])
+    vectors = await cached.embed_many(["b", "c", "a", "c"])
+    cached.close()
+
+    assert batches == [["a", "b"], ["c"]]
+    for text, vec in zip(["b", "c", "a", "c"], vectors):
+        assert np.array_equal(vec, await base(text))
+
+
+def test_sentence_transformer_concurrent_first_calls_load_once(fake_sentence_transformers) -> None:
+    loaded = []
+
+    class FakeModel:
+        def __init__(self, model_name):
+            time.sleep(0.05)  # widen the window for a second thread to miss
+            loaded.append(model_name)
+
+    fake_sentence_transformers(FakeModel)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: embedders.sentence_transformer_embedder(), range(4)))
+
+    assert len(loaded) == 1
+    assert all(r is results[0] for r in results)
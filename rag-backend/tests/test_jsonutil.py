@@ -0,0 +1,61 @@
+"""
+Tests for the jsonutil module.
+
+Tests cover:
+- dumps_line: orjson fast path, stdlib fallback for NaN/Infinity and >64-bit ints
+- loads: orjson fast path, stdlib fallback for NaN/Infinity and >64-bit ints
+"""
+
+import json
+import math
+
+import pytest
+
+import jsonutil
+from jsonutil import dumps_line, loads
+
+
+class TestDumpsLine:
+    """Tests for dumps_line."""
+
+    def test_writes_one_utf8_line(self):
+        assert dumps_line({"path": "café", "new": 1.5}).decode("utf-8").count("\n") == 1
+        assert loads(dumps_line({"path": "café", "new": 1.5})) == {"path": "café", "new": 1.5}
+
+    def test_keeps_nan_and_infinity(self):
+        """Should not let orjson write non-finite floats as null."""
+        line = dumps_line({"a": float("nan"), "b": [float("-inf")]})
+
+        assert line == b'{"a": NaN, "b": [-Infinity]}\n'
+
+    def test_keeps_big_ints(self):
+        assert loads(dumps_line({"n": 2**70})) == {"n": 2**70}
+
+    def test_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(jsonutil, "orjson", None)
+
+        assert dumps_line({"a": 1}) == b'{"a": 1}\n'
+
+
+class TestLoads:
+    """Tests for loads."""
+
+    def test_parses_str_and_bytes(self):
+        assert loads('{"a": [1, 2.5, null]}') == {"a": [1, 2.5, None]}
+        assert loads(b'{"a": true}') == {"a": True}
+
+    def test_parses_nan_and_infinity(self):
+        data = loads('{"a": NaN, "b": Infinity, "c": -Infinity}')
+
+        assert math.isnan(data["a"])
+        assert (data["b"], data["c"]) == (math.inf, -math.inf)
+
+    def test_big_ints_stay_exact(self):
+        """Should not round ints wider than 64 bits to floats."""
+        assert loads(b'{"n": 123456789012345678901234567890}') == {
+            "n": 123456789012345678901234567890
+        }
+
+    def test_raises_json_decode_error(self):
+        with pytest.raises(json.JSONDecodeError):
+            loads("not json {{{")
@@ -0,0 +1,151 @@
+"""
+Tests for the llm_cache module.
+
+Tests cover:
+- cache_key: sensitivity to model and prompt
+- CachingLLMClient: hits, misses, LRU eviction, TTL expiry, bypass, streams
+"""
+
+import pytest
+import time_machine
+from jig import CompletionParams, Message, Role
+from jig.core.errors import JigLLMError
+
+from helpers import MockLLMClient, make_llm_response
+from llm_cache import CachingLLMClient, cache_key
+
+MODEL = "claude-sonnet-4-20250514"
+
+
+def make_params(prompt: str) -> CompletionParams:
+    return CompletionParams(messages=[Message(role=Role.USER, content=prompt)], max_tokens=1024)
+
+
+class TestCacheKey:
+    """Tests for the cache_key function."""
+
+    def test_same_prompt_same_key(self):
+        """Should be stable for equal params."""
+        assert cache_key(MODEL, make_params("a")) == cache_key(MODEL, make_params("a"))
+
+    def test_differs_by_prompt_and_model(self):
+        """Should change with the prompt or the model."""
+        key = cache_key(MODEL, make_params("a"))
+        assert cache_key(MODEL, make_params("b")) != key
+        assert cache_key("other-model", make_params("a")) != key
+
+    def test_differs_by_system_prompt(self):
+        """Should change with the system prompt (follow-up document context)."""
+        with_system = CompletionParams(
+            messages=[Message(role=Role.USER, content="a")], system="docs", max_tokens=1024
+        )
+        assert cache_key(MODEL, with_system) != cache_key(MODEL, make_params("a"))
+
+
+class TestCachingLLMClient:
+    """Tests for the CachingLLMClient wrapper."""
+
+    @pytest.mark.asyncio
+    async def test_repeated_prompt_hits_cache(self):
+        """Should call the wrapped client once per distinct prompt."""
+        inner = MockLLMClient([make_llm_response("first"), make_llm_response("second")])
+        client = CachingLLMClient(inner, model=MODEL)
+
+        assert (await client.complete(make_params("a"))).content == "first"
+        assert (await client.complete(make_params("a"))).content == "first"
+        assert (await client.complete(make_params("b"))).content == "second"
+        assert len(inner.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self):
+        """Should drop the least recently used prompt when full."""
+        inner = MockLLMClient([make_llm_response(str(i)) for i in range(4)])
+        client = CachingLLMClient(inner, model=MODEL, maxsize=2)
+
+        await client.complete(make_params("a"))
+        await client.complete(make_params("b"))
+        await client.complete(make_params("a"))  # refresh a
+        await client.complete(make_params("c"))  # evicts b
+
+        assert len(client) == 2
+        assert (await client.complete(make_params("a"))).content == "0"
+        assert (await client.complete(make_params("b"))).content == "3"
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_refetched(self):
+        """Should call the wrapped client again once the TTL has passed."""
+        inner = MockLLMClient([make_llm_response("old"), make_llm_response("new")])
+        client = CachingLLMClient(inner, model=MODEL, ttl_seconds=60)
+
+        with time_machine.travel(0, tick=False) as traveller:
+            await client.complete(make_params("a"))
+            traveller.shift(61)
+            assert (await client.complete(make_params("a"))).content == "new"
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        """Should let errors propagate and retry on the next call."""
+        class FlakyClient(MockLLMClient):
+            async def complete(self, params):
+                if not self.calls:
+                    self.calls.append(params)
+                    raise JigLLMError("Service unavailable", provider="anthropic")
+                return await super().complete(params)
+
+        client = CachingLLMClient(FlakyClient([make_llm_response("ok")]), model=MODEL)
+
+        with pytest.raises(JigLLMError):
+            await client.complete(make_params("a"))
+        assert (await client.complete(make_params("a"))).content == "ok"
+
+    @pytest.mark.asyncio
+    async def test_truncated_responses_are_not_cached(self):
+        """Should ask again after a response cut off at max_tokens."""
+        truncated = make_llm_response('{"rationale": "cut')
+        truncated.stop_reason = "max_tokens"
+        inner = MockLLMClient([truncated, make_llm_response("whole")])
+        client = CachingLLMClient(inner, model=MODEL)
+
+        assert (await client.complete(make_params("a"))).content == '{"rationale": "cut'
+        assert (await client.complete(make_params("a"))).content == "whole"
+        assert len(inner.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_rejected_responses_are_not_cached(self):
+        """Should not store responses that fail validate."""
+        inner = MockLLMClient([make_llm_response("bad"), make_llm_response("good")])
+        client = CachingLLMClient(inner, model=MODEL, validate=lambda text: text == "good")
+
+        assert (await client.complete(make_params("a"))).content == "bad"
+        assert (await client.complete(make_params("a"))).content == "good"
+        assert (await client.complete(make_params("a"))).content == "good"
+        assert len(inner.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_stream_passes_through_uncached(self):
+        """Should delegate streams to the wrapped client without caching them."""
+        class StreamingClient(MockLLMClient):
+            async def stream(self, params):
+                self.calls.append(params)
+                yield "a"
+                yield "b"
+
+        inner = StreamingClient([])
+        client = CachingLLMClient(inner, model=MODEL)
+
+        assert [t async for t in client.stream(make_params("a"))] == ["a", "b"]
+        assert [t async for t in client.stream(make_params("a"))] == ["a", "b"]
+        assert len(inner.calls) == 2
+        assert len(client) == 0
+
+    @pytest.mark.asyncio
+    async def test_zero_size_disables_cache(self):
+        """Should pass every call through when maxsize is 0."""
+        inner = MockLLMClient([make_llm_response("1"), make_llm_response("2")])
+        client = CachingLLMClient(inner, model=MODEL, maxsize=0)
+
+        await client.complete(make_params("a"))
+        await client.complete(make_params("a"))
+
+        assert len(inner.calls) == 2
+        assert len(client) == 0
@@ -4,14 +4,15 @@ Tests for the loader module.
 
 import pytest
 from pathlib import Path
-import tempfile
 
 from loader import (
     load_content,
     load_single_file,
     flatten_document,
     extract_metadata,
-    get_entry_by_id
+    get_entry_by_id,
+    build_id_index,
+    parse_yaml,
 )
 
 
@@ -97,28 +98,36 @@ links:
     relationship: "informs"
 """
 
+# Parsed once; flatten/extract tests only read these
+PARSED_ENTRY = parse_yaml(SAMPLE_ENTRY)
+PARSED_SUMMARY = parse_yaml(SAMPLE_SUMMARY)
 
-@pytest.fixture
-def temp_content_dir():
-    """Create a temporary content directory with sample files."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        # Create entries directory
-        entries_dir = Path(tmpdir) / "entries"
-        entries_dir.mkdir()
-        
-        # Create summaries directory
-        summaries_dir = Path(tmpdir) / "summaries"
-        summaries_dir.mkdir()
-        
-        # Write sample entry
-        entry_file = entries_dir / "test-entry.yaml"
-        entry_file.write_text(SAMPLE_ENTRY)
-        
-        # Write sample summary
-        summary_file = summaries_dir / "test-summary.yaml"
-        summary_file.write_text(SAMPLE_SUMMARY)
-        
-        yield tmpdir
+
+@pytest.fixture(scope="session")
+def temp_content_dir(tmp_path_factory):
+    """Content directory with one sample entry and one summary.
+
+    Built once per session and shared, so tests must treat it as read-only.
+    """
+    content_dir = tmp_path_factory.mktemp("content").resolve()
+    
+    # Create entries directory
+    entries_dir = content_dir / "entries"
+    entries_dir.mkdir()
+    
+    # Create summaries directory
+    summaries_dir = content_dir / "summaries"
+    summaries_dir.mkdir()
+    
+    # Write sample entry
+    entry_file = entries_dir / "test-entry.yaml"
+    entry_file.write_text(SAMPLE_ENTRY)
+    
+    # Write sample summary
+    summary_file = summaries_dir / "test-summary.yaml"
+    summary_file.write_text(SAMPLE_SUMMARY)
+    
+    return str(content_dir)
 
 
 class TestLoadContent:
@@ -133,11 +142,22 @@ class TestLoadContent:
         assert "test-entry-001" in ids
         assert "test-summary-001" in ids
     
-    def test_load_content_empty_directory(self):
+    def test_load_content_many_files(self, tmp_path):
+        """Should load every valid file, skipping bad ones, when loading in parallel."""
+        entries_dir = tmp_path / "entries"
+        entries_dir.mkdir()
+        for i in range(6):
+            (entries_dir / f"entry-{i}.yaml").write_text(f"id: entry-{i}\ntopic: Topic {i}\n")
+        (entries_dir / "broken.yaml").write_text("id: [unclosed\n")
+        
+        documents = load_content(str(tmp_path))
+        
+        assert sorted(d["id"] for d in documents) == [f"entry-{i}" for i in range(6)]
+    
+    def test_load_content_empty_directory(self, tmp_path):
         """Should handle empty directories gracefully."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            documents = load_content(tmpdir)
-            assert documents == []
+        documents = load_content(str(tmp_path))
+        assert documents == []
     
     def test_load_content_missing_directory(self):
         """Should handle missing directories gracefully."""
@@ -168,23 +188,57 @@ class TestLoadSingleFile:
         assert doc["id"] == "test-summary-001"
         assert doc["metadata"]["type"] == "summary"
     
-    def test_load_file_missing_id(self, temp_content_dir):
+    def test_load_file_missing_id(self, tmp_path):
         """Should return None for files without id."""
-        file_path = Path(temp_content_dir) / "entries" / "invalid.yaml"
+        # Own dir: temp_content_dir is shared and must stay read-only
+        file_path = tmp_path / "invalid.yaml"
         file_path.write_text("topic: No ID here")
         
         doc = load_single_file(file_path)
         assert doc is None
 
 
+class TestParseYaml:
+    """Tests for parse_yaml function."""
+    
+    def test_yaml_1_1_booleans_stay_strings(self):
+        """Should read only true/false as booleans, like ruamel (YAML 1.2)."""
+        data = parse_yaml("a: yes\nb: no\nc: on\nd: off\ne: true\nf: False\n")
+        
+        assert data == {"a": "yes", "b": "no", "c": "on", "d": "off", "e": True, "f": False}
+
+    def test_yaml_1_1_sexagesimal_times_stay_strings(self):
+        """Should read 10:30 as a string, not the base-60 int 630."""
+        assert parse_yaml("start: 10:30\nend: -1:20:00\n") == {"start": "10:30", "end": "-1:20:00"}
+
+    def test_leading_zero_numbers_are_decimal(self):
+        """Should read 0777 as 777 and only 0o/0x prefixes as other bases."""
+        data = parse_yaml("a: 0777\nb: 0o17\nc: 0x1F\nd: 012.5\ne: -007\n")
+
+        assert data == {"a": 777, "b": 15, "c": 31, "d": 12.5, "e": -7}
+
+    def test_underscored_numbers_stay_strings(self):
+        """Should not read YAML 1.1 digit separators as numbers."""
+        assert parse_yaml("a: 1_000\nb: 1_000.5\nc: 0b101\n") == {
+            "a": "1_000", "b": "1_000.5", "c": "0b101"
+        }
+
+    def test_yaml_1_2_numbers(self):
+        """Should still read core-schema ints, floats, infinities and NaN."""
+        data = parse_yaml("a: 42\nb: -3\nc: 1.5e3\nd: .5\ne: 1.\nf: -.inf\ng: .NaN\nh: 1e3\n")
+
+        assert data["a"] == 42 and isinstance(data["a"], int)
+        assert (data["b"], data["c"], data["d"], data["e"], data["h"]) == (-3, 1500.0, 0.5, 1.0, 1000.0)
+        assert data["f"] == float("-inf")
+        assert data["g"] != data["g"]
+
+
 class TestFlattenDocument:
     """Tests for flatten_document function."""
     
     def test_flatten_entry(self):
         """Should flatten entry fields correctly."""
-        from ruamel.yaml import YAML
-        yaml = YAML()
-        entry = yaml.load(SAMPLE_ENTRY)
+        entry = PARSED_ENTRY
         
         flattened = flatten_document(entry)
         
@@ -201,9 +255,7 @@ class TestFlattenDocument:
     
     def test_flatten_summary(self):
         """Should flatten summary fields correctly."""
-        from ruamel.yaml import YAML
-        yaml = YAML()
-        summary = yaml.load(SAMPLE_SUMMARY)
+        summary = PARSED_SUMMARY
         
         flattened = flatten_document(summary)
         
@@ -225,9 +277,7 @@ class TestExtractMetadata:
     
     def test_extract_entry_metadata(self, temp_content_dir):
         """Should extract metadata from entry."""
-        from ruamel.yaml import YAML
-        yaml = YAML()
-        entry = yaml.load(SAMPLE_ENTRY)
+        entry = PARSED_ENTRY
         file_path = Path(temp_content_dir) / "entries" / "test.yaml"
         
         metadata = extract_metadata(entry, file_path)
@@ -240,9 +290,7 @@ class TestExtractMetadata:
     
     def test_extract_summary_metadata(self, temp_content_dir):
         """Should extract metadata from summary with date_range."""
-        from ruamel.yaml import YAML
-        yaml = YAML()
-        summary = yaml.load(SAMPLE_SUMMARY)
+        summary = PARSED_SUMMARY
         file_path = Path(temp_content_dir) / "summaries" / "test.yaml"
         
         metadata = extract_metadata(summary, file_path)
@@ -256,17 +304,26 @@ class TestGetEntryById:
     
     def test_find_existing_entry(self, temp_content_dir):
         """Should find entry by ID."""
-        documents = load_content(temp_content_dir)
+        index = build_id_index(load_content(temp_content_dir))
         
-        entry = get_entry_by_id(documents, "test-entry-001")
+        entry = get_entry_by_id(index, "test-entry-001")
         
         assert entry is not None
         assert entry["id"] == "test-entry-001"
     
     def test_not_found(self, temp_content_dir):
         """Should return None for non-existent ID."""
-        documents = load_content(temp_content_dir)
+        index = build_id_index(load_content(temp_content_dir))
         
-        entry = get_entry_by_id(documents, "nonexistent")
+        entry = get_entry_by_id(index, "nonexistent")
         
         assert entry is None
+    
+    def test_accepts_document_list(self, temp_content_dir):
+        """Should still scan a plain list of documents."""
+        documents = load_content(temp_content_dir)
+        
+        entry = get_entry_by_id(documents, "test-summary-001")
+        
+        assert entry is not None
+        assert entry["id"] == "test-summary-001"
@@ -6,7 +6,7 @@ Tests cover:
 - synthesize_step: prompt building, LLM call, response formatting
 - propose_step: prompt building, LLM call, JSON parsing
 - Query pipeline: end-to-end with mocks
-- Proposal map_pipeline: fan-out over multiple summaries
+- Proposal map_pipeline: fan-out over multiple summaries (sequential and concurrent)
 """
 
 import pytest
@@ -18,6 +18,7 @@ from jig.tracing import StdoutTracer
 from jig.core.errors import JigLLMError
 
 from helpers import MockLLMClient, make_llm_response
+from vectorstore import VectorStore
 
 
 class TestRetrieveStep:
@@ -28,7 +29,7 @@ class TestRetrieveStep:
         """Should call vector_store.query with correct args."""
         from pipelines import retrieve_step
 
-        mock_store = MagicMock()
+        mock_store = MagicMock(spec=VectorStore)
         mock_store.query = AsyncMock(return_value=[
             {"id": "doc-1", "content": "Test", "metadata": {}, "distance": 0.1}
         ])
@@ -49,7 +50,7 @@ class TestRetrieveStep:
         """Should default n_results to 5 if not specified."""
         from pipelines import retrieve_step
 
-        mock_store = MagicMock()
+        mock_store = MagicMock(spec=VectorStore)
         mock_store.query = AsyncMock(return_value=[])
 
         ctx = {
@@ -217,6 +218,27 @@ class TestProposeStep:
         assert "Failed to parse" in result["error"]
         assert result["target_summary_id"] == "summary-nullifiers"
 
+    @pytest.mark.asyncio
+    async def test_malformed_response_not_replayed_from_cache(self, sample_input):
+        """Should ask the LLM again on retry instead of replaying bad JSON."""
+        from llm_cache import CachingLLMClient
+        from pipelines import propose_step
+        from proposer import is_parseable_proposal
+
+        mock_client = MockLLMClient([
+            make_llm_response("This is not valid JSON {{{"),
+            make_llm_response(json.dumps({"rationale": "Retried"})),
+        ])
+        llm = CachingLLMClient(mock_client, model="claude", validate=is_parseable_proposal)
+
+        first = await propose_step({"input": sample_input, "llm": llm})
+        second = await propose_step({"input": sample_input, "llm": llm})
+        third = await propose_step({"input": sample_input, "llm": llm})
+
+        assert "error" in first
+        assert second["rationale"] == third["rationale"] == "Retried"
+        assert len(mock_client.calls) == 2
+
     @pytest.mark.asyncio
     async def test_handles_llm_error(self, sample_input):
         """Should handle LLM errors gracefully."""
@@ -255,7 +277,7 @@ class TestQueryPipelineIntegration:
         """Should run full query pipeline with mocks."""
         from pipelines import build_query_pipeline
 
-        mock_store = MagicMock()
+        mock_store = MagicMock(spec=VectorStore)
         mock_store.query = AsyncMock(return_value=[
             {"id": "doc-1", "content": "ZK content", "metadata": {"type": "entry", "topic": "ZK"}},
         ])
@@ -326,3 +348,58 @@ class TestProposalMapPipeline:
         ]
         assert len(proposals) == 1
         assert proposals[0]["target_summary_id"] == "summary-1"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_fan_out_overlaps_llm_calls(self):
+        """Should run items concurrently, capped, and keep results in item order."""
+        import asyncio
+        from pipelines import build_proposal_pipeline, map_pipeline_concurrent
+
+        in_flight = 0
+        max_in_flight = 0
+
+        class SlowLLMClient(MockLLMClient):
+            async def complete(self, params):
+                nonlocal in_flight, max_in_flight
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return make_llm_response(json.dumps({"rationale": "R"}))
+
+        entry = {"id": "entry-test", "content": "New entry content", "metadata": {}}
+        summaries = [{"id": f"summary-{i}", "content": f"Summary {i}", "metadata": {}} for i in range(5)]
+
+        map_result = await map_pipeline_concurrent(
+            build_proposal_pipeline(StdoutTracer(color=False)),
+            items=[{"entry": entry, "summary": s} for s in summaries],
+            context={"llm": SlowLLMClient([])},
+            max_concurrency=3,
+        )
+
+        assert max_in_flight == 3
+        assert [r.output["target_summary_id"] for r in map_result.results] == [s["id"] for s in summaries]
+
+    @pytest.mark.asyncio
+    async def test_concurrency_below_one_runs_serially(self):
+        """Should treat a max_concurrency of 0 as 1 rather than hang."""
+        import asyncio
+        from pipelines import build_proposal_pipeline, map_pipeline_concurrent
+
+        entry = {"id": "entry-test", "content": "New entry content", "metadata": {}}
+        mock_client = MockLLMClient([make_llm_response(json.dumps({"rationale": "R"}))] * 2)
+
+        map_result = await asyncio.wait_for(
+            map_pipeline_concurrent(
+                build_proposal_pipeline(StdoutTracer(color=False)),
+                items=[
+                    {"entry": entry, "summary": {"id": f"summary-{i}", "content": "S", "metadata": {}}}
+                    for i in range(2)
+                ],
+                context={"llm": mock_client},
+                max_concurrency=0,
+            ),
+            timeout=5,
+        )
+
+        assert len(map_result.results) == 2
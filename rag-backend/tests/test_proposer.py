@@ -11,11 +11,29 @@ import pytest
 import json
 from unittest.mock import AsyncMock, MagicMock
 
+from proposer import (
+    build_proposal_prompt,
+    identify_related_summaries,
+    parse_proposal_response,
+)
+from vectorstore import VectorStore
+
+# LLM response payloads for parse_proposal_response, encoded once
+PROPOSAL_JSON = json.dumps({
+    "new_learnings": [{"insight": "Test insight", "context": "Test"}],
+    "rationale": "Test rationale",
+})
+NO_UPDATES_JSON = json.dumps({
+    "no_updates": True,
+    "rationale": "Entry doesn't add new information",
+})
+RATIONALE_ONLY_JSON = json.dumps({"rationale": "test"})
+
 
 class TestIdentifyRelatedSummaries:
     """Tests for identify_related_summaries function."""
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def sample_entry(self):
         """Sample entry for testing."""
         return {
@@ -37,7 +55,7 @@ class TestIdentifyRelatedSummaries:
     @pytest.fixture
     def mock_vector_store(self):
         """Create a mock VectorStore with async methods."""
-        store = MagicMock()
+        store = MagicMock(spec=VectorStore)
         # Methods that post-phase-13 VectorStore awaits — use AsyncMock so
         # `await store.method()` returns the configured value.
         store.get_summaries = AsyncMock(return_value=[
@@ -75,8 +93,6 @@ class TestIdentifyRelatedSummaries:
 
     async def test_explicit_links_get_highest_score(self, sample_entry, mock_vector_store):
         """Explicitly linked summaries should get score 1.0."""
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store)
 
         linked = next((r for r in results if r["id"] == "summary-nullifiers"), None)
@@ -86,8 +102,6 @@ class TestIdentifyRelatedSummaries:
 
     async def test_semantic_search_results_included(self, sample_entry, mock_vector_store):
         """Semantically similar summaries should be included."""
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store)
 
         result_ids = [r["id"] for r in results]
@@ -95,8 +109,6 @@ class TestIdentifyRelatedSummaries:
 
     async def test_semantic_score_decays_with_rank(self, sample_entry, mock_vector_store):
         """Semantic matches should have decaying scores based on rank."""
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store)
 
         privacy = next((r for r in results if r["id"] == "summary-privacy"), None)
@@ -107,8 +119,6 @@ class TestIdentifyRelatedSummaries:
 
     async def test_tag_overlap_boosts_score(self, sample_entry, mock_vector_store):
         """Tag overlap should boost candidate scores."""
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store)
 
         privacy = next((r for r in results if r["id"] == "summary-privacy"), None)
@@ -117,8 +127,6 @@ class TestIdentifyRelatedSummaries:
 
     async def test_topic_match_boosts_score(self, sample_entry, mock_vector_store):
         """Topic match should boost candidate scores."""
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store)
 
         nullifiers = next((r for r in results if r["id"] == "summary-nullifiers"), None)
@@ -127,15 +135,11 @@ class TestIdentifyRelatedSummaries:
 
     async def test_respects_max_results(self, sample_entry, mock_vector_store):
         """Should respect max_results limit."""
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store, max_results=2)
         assert len(results) <= 2
 
     async def test_results_sorted_by_score(self, sample_entry, mock_vector_store):
         """Results should be sorted by score descending."""
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store)
 
         scores = [r["score"] for r in results]
@@ -145,8 +149,6 @@ class TestIdentifyRelatedSummaries:
         """Should return empty list when no summaries exist."""
         mock_vector_store.get_summaries.return_value = []
 
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(sample_entry, mock_vector_store)
         assert results == []
 
@@ -159,8 +161,6 @@ class TestIdentifyRelatedSummaries:
             "raw": {"id": "entry-new"}
         }
 
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(entry, mock_vector_store)
         assert len(results) > 0
 
@@ -173,8 +173,6 @@ class TestIdentifyRelatedSummaries:
             "raw": {"id": "entry-new"}
         }
 
-        from proposer import identify_related_summaries
-
         results = await identify_related_summaries(entry, mock_vector_store)
         assert isinstance(results, list)
 
@@ -182,7 +180,7 @@ class TestIdentifyRelatedSummaries:
 class TestBuildProposalPrompt:
     """Tests for build_proposal_prompt function."""
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def sample_entry(self):
         return {
             "id": "entry-test",
@@ -190,7 +188,7 @@ class TestBuildProposalPrompt:
             "metadata": {"type": "entry", "topic": "Nullifiers"},
         }
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def sample_summary(self):
         return {
             "id": "summary-nullifiers",
@@ -200,32 +198,24 @@ class TestBuildProposalPrompt:
 
     def test_includes_entry_content(self, sample_entry, sample_summary):
         """Should include entry content in the prompt."""
-        from proposer import build_proposal_prompt
-
         prompt = build_proposal_prompt(sample_entry, sample_summary)
         assert sample_entry["content"] in prompt
         assert sample_entry["id"] in prompt
 
     def test_includes_summary_content(self, sample_entry, sample_summary):
         """Should include summary content in the prompt."""
-        from proposer import build_proposal_prompt
-
         prompt = build_proposal_prompt(sample_entry, sample_summary)
         assert sample_summary["content"] in prompt
         assert sample_summary["id"] in prompt
 
     def test_includes_entry_metadata(self, sample_entry, sample_summary):
         """Should include entry type and topic."""
-        from proposer import build_proposal_prompt
-
         prompt = build_proposal_prompt(sample_entry, sample_summary)
         assert "entry" in prompt
         assert "Nullifiers" in prompt
 
     def test_includes_json_format_instructions(self, sample_entry, sample_summary):
         """Should include JSON format instructions."""
-        from proposer import build_proposal_prompt
-
         prompt = build_proposal_prompt(sample_entry, sample_summary)
         assert "new_learnings" in prompt
         assert "new_decisions" in prompt
@@ -236,7 +226,7 @@ class TestBuildProposalPrompt:
 class TestParseProposalResponse:
     """Tests for parse_proposal_response function."""
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def sample_summary(self):
         return {
             "id": "summary-nullifiers",
@@ -244,20 +234,13 @@ class TestParseProposalResponse:
             "match_reason": "semantic_similarity",
         }
 
-    @pytest.fixture
+    @pytest.fixture(scope="session")
     def sample_entry(self):
         return {"id": "entry-test"}
 
     def test_parses_valid_json(self, sample_summary, sample_entry):
         """Should parse valid JSON response."""
-        from proposer import parse_proposal_response
-
-        text = json.dumps({
-            "new_learnings": [{"insight": "Test insight", "context": "Test"}],
-            "rationale": "Test rationale",
-        })
-
-        result = parse_proposal_response(text, sample_summary, sample_entry)
+        result = parse_proposal_response(PROPOSAL_JSON, sample_summary, sample_entry)
         assert result["target_summary_id"] == "summary-nullifiers"
         assert result["source_entry_id"] == "entry-test"
         assert result["match_score"] == 0.85
@@ -266,8 +249,6 @@ class TestParseProposalResponse:
 
     def test_parses_json_code_block(self, sample_summary, sample_entry):
         """Should parse JSON wrapped in ```json code blocks."""
-        from proposer import parse_proposal_response
-
         text = """Here's the proposal:
 
 ```json
@@ -285,8 +266,6 @@ This should help update the summary."""
 
     def test_parses_generic_code_block(self, sample_summary, sample_entry):
         """Should parse JSON wrapped in generic ``` code blocks."""
-        from proposer import parse_proposal_response
-
         text = '```\n{"new_open_questions": ["What about edge cases?"]}\n```'
 
         result = parse_proposal_response(text, sample_summary, sample_entry)
@@ -295,30 +274,27 @@ This should help update the summary."""
 
     def test_parses_no_updates_response(self, sample_summary, sample_entry):
         """Should handle no_updates response."""
-        from proposer import parse_proposal_response
+        result = parse_proposal_response(NO_UPDATES_JSON, sample_summary, sample_entry)
+        assert result.get("no_updates") is True
+        assert result["target_summary_id"] == "summary-nullifiers"
 
-        text = json.dumps({
-            "no_updates": True,
-            "rationale": "Entry doesn't add new information",
-        })
+    def test_parses_nan_and_big_ints(self, sample_summary, sample_entry):
+        """Should accept what stdlib json does, where orjson rejects or rounds."""
+        text = '{"rationale": "test", "confidence": NaN, "count": 123456789012345678901234567890}'
 
         result = parse_proposal_response(text, sample_summary, sample_entry)
-        assert result.get("no_updates") is True
-        assert result["target_summary_id"] == "summary-nullifiers"
+
+        assert result["confidence"] != result["confidence"]
+        assert result["count"] == 123456789012345678901234567890
 
     def test_raises_on_invalid_json(self, sample_summary, sample_entry):
         """Should raise JSONDecodeError on invalid JSON."""
-        from proposer import parse_proposal_response
-
         with pytest.raises(json.JSONDecodeError):
             parse_proposal_response("This is not valid JSON {{{", sample_summary, sample_entry)
 
     def test_injects_metadata(self, sample_summary, sample_entry):
         """Should inject target_summary_id, source_entry_id, match_score, match_reason."""
-        from proposer import parse_proposal_response
-
-        text = json.dumps({"rationale": "test"})
-        result = parse_proposal_response(text, sample_summary, sample_entry)
+        result = parse_proposal_response(RATIONALE_ONLY_JSON, sample_summary, sample_entry)
 
         assert result["target_summary_id"] == "summary-nullifiers"
         assert result["source_entry_id"] == "entry-test"
@@ -4,11 +4,33 @@ Tests for the synthesizer module.
 Tests cover:
 - build_synthesis_prompt: context formatting, truncation, source tracking
 - build_followup_system_prompt: system prompt construction
+- stream_synthesis: streamed answer deltas, non-streaming fallback, errors
 - synthesize_with_followup: async synthesis with conversation history
 """
 
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
 from helpers import MockLLMClient, make_llm_response
+from jig.llm import AnthropicClient
+
+from llm_cache import CachingLLMClient
+
+
+def make_anthropic_client(*texts: str) -> MagicMock:
+    """AnthropicClient stand-in answering with the given texts in order."""
+    client = MagicMock(spec=AnthropicClient)
+    client.complete = AsyncMock(side_effect=[make_llm_response(t) for t in texts])
+    return client
+
+
+class StreamingLLMClient(MockLLMClient):
+    """MockLLMClient that streams each canned response in word-sized deltas."""
+
+    async def stream(self, params):
+        response = await self.complete(params)
+        for word in response.content.split(" "):
+            yield word + " "
 
 
 class TestBuildSynthesisPrompt:
@@ -107,6 +129,46 @@ class TestBuildSynthesisPrompt:
         assert "<query>test</query>" in prompt
 
 
+class TestStreamSynthesis:
+    """Tests for stream_synthesis function."""
+
+    @pytest.mark.asyncio
+    async def test_yields_deltas_from_stream(self):
+        """Should yield the client's stream deltas as they arrive."""
+        from synthesizer import stream_synthesis
+
+        mock_client = StreamingLLMClient([make_llm_response("Nullifiers prevent double-spends.")])
+
+        chunks = [chunk async for chunk in stream_synthesis("prompt", mock_client)]
+
+        assert len(chunks) == 3
+        assert "".join(chunks).strip() == "Nullifiers prevent double-spends."
+        assert mock_client.calls[0].messages[0].content == "prompt"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_complete_without_streaming(self):
+        """Should yield the full completion once when the client can't stream."""
+        from synthesizer import stream_synthesis
+
+        mock_client = MockLLMClient([make_llm_response("Whole answer.")])
+
+        chunks = [chunk async for chunk in stream_synthesis("prompt", mock_client)]
+
+        assert chunks == ["Whole answer."]
+
+    @pytest.mark.asyncio
+    async def test_yields_error_message_on_llm_failure(self):
+        """Should end the stream with an error message instead of raising."""
+        from synthesizer import stream_synthesis
+
+        mock_client = StreamingLLMClient([])  # IndexError on first call
+
+        chunks = [chunk async for chunk in stream_synthesis("prompt", mock_client)]
+
+        assert len(chunks) == 1
+        assert chunks[0].startswith("Error generating answer:")
+
+
 class TestBuildFollowupSystemPrompt:
     """Tests for build_followup_system_prompt function."""
 
@@ -185,6 +247,18 @@ class TestSynthesizeWithFollowup:
         assert "answer" in result
         assert result["answer"] == "Answer without history."
 
+    @pytest.mark.asyncio
+    async def test_no_entries_skips_llm(self):
+        """Should answer without calling the LLM when nothing was retrieved."""
+        mock_client = MockLLMClient([])
+
+        from synthesizer import synthesize_with_followup
+
+        result = await synthesize_with_followup("What is ZK?", [], mock_client)
+
+        assert result == {"answer": "No relevant documents found for your query.", "sources": []}
+        assert mock_client.calls == []
+
     @pytest.mark.asyncio
     async def test_returns_sources(self, sample_entries):
         """Should return entry IDs as sources."""
@@ -207,3 +281,64 @@ class TestSynthesizeWithFollowup:
         params = mock_client.calls[0]
         assert params.system is not None
         assert "retrieved documents" in params.system.lower() or "knowledge" in params.system.lower()
+
+    @pytest.mark.asyncio
+    async def test_marks_system_prompt_for_prompt_caching(self, sample_entries):
+        """Should send the system prompt as an ephemeral-cached block for Anthropic."""
+        mock_client = make_anthropic_client("Answer.")
+
+        from synthesizer import synthesize_with_followup
+
+        await synthesize_with_followup("test", sample_entries, mock_client)
+
+        params = mock_client.complete.await_args.args[0]
+        assert params.provider_params["system"] == [
+            {"type": "text", "text": params.system, "cache_control": {"type": "ephemeral"}}
+        ]
+
+    @pytest.mark.asyncio
+    async def test_marks_system_prompt_through_caching_wrapper(self, sample_entries):
+        """Should see through CachingLLMClient to the Anthropic client it wraps."""
+        mock_client = make_anthropic_client("Answer.")
+
+        from synthesizer import synthesize_with_followup
+
+        await synthesize_with_followup(
+            "test", sample_entries, CachingLLMClient(mock_client, model="claude")
+        )
+
+        params = mock_client.complete.await_args.args[0]
+        assert params.provider_params["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+    @pytest.mark.asyncio
+    async def test_no_cache_params_for_other_providers(self, sample_entries):
+        """Should leave provider_params unset for non-Anthropic clients."""
+        mock_client = MockLLMClient([make_llm_response("Answer.")])
+
+        from synthesizer import synthesize_with_followup
+
+        await synthesize_with_followup("test", sample_entries, mock_client)
+
+        assert mock_client.calls[0].provider_params is None
+
+    @pytest.mark.asyncio
+    async def test_cached_prefix_is_identical_across_turns(self, sample_entries):
+        """Should send a byte-identical cached block on every turn over the same entries."""
+        mock_client = make_anthropic_client("First.", "Second.")
+
+        from synthesizer import synthesize_with_followup
+
+        await synthesize_with_followup("What is ZK?", sample_entries, mock_client)
+        await synthesize_with_followup(
+            "Tell me more",
+            sample_entries,
+            mock_client,
+            conversation_history=[
+                {"role": "user", "content": "What is ZK?"},
+                {"role": "assistant", "content": "First."},
+            ],
+        )
+
+        first, second = [call.args[0] for call in mock_client.complete.await_args_list]
+        assert first.provider_params == second.provider_params
+        assert len(second.messages) == 3
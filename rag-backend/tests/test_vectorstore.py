@@ -8,85 +8,127 @@ construction and awaits changed.
 
 from __future__ import annotations
 
+import asyncio
+import copy
+import shutil
+from unittest.mock import AsyncMock
+
 import pytest
 
+import vectorstore
 from embedders import mock_embedder
 from vectorstore import VectorStore
 
 
+SAMPLE_DOCUMENTS = [
+    {
+        "id": "doc-001",
+        "content": "Zero-knowledge proofs allow verification without revealing data.",
+        "metadata": {
+            "type": "entry",
+            "topic": "ZK Proofs Basics",
+            "tags": "zk,cryptography",
+            "status": "active",
+        },
+    },
+    {
+        "id": "doc-002",
+        "content": "Nullifiers prevent double-spending in anonymous systems.",
+        "metadata": {
+            "type": "entry",
+            "topic": "Nullifiers",
+            "tags": "zk,privacy",
+            "status": "active",
+        },
+    },
+    {
+        "id": "summary-001",
+        "content": "Summary of zero-knowledge concepts and learnings.",
+        "metadata": {
+            "type": "summary",
+            "topic": "ZK Summary",
+            "tags": "zk,summary",
+            "status": "reference",
+        },
+    },
+]
+
+
+@pytest.fixture(scope="session")
+def embedder():
+    """Mock embedder shared by the whole session (it is stateless)."""
+    return mock_embedder()
+
+
 @pytest.fixture
-async def vector_store(tmp_path):
+async def vector_store(tmp_path, embedder):
     """VectorStore with mock embeddings, one-shot per test."""
-    store = VectorStore(str(tmp_path / "memory.db"), embedder=mock_embedder())
+    store = VectorStore(str(tmp_path / "memory.db"), embedder=embedder)
     yield store
     await store.close()
 
 
 @pytest.fixture
 def sample_documents():
-    return [
-        {
-            "id": "doc-001",
-            "content": "Zero-knowledge proofs allow verification without revealing data.",
-            "metadata": {
-                "type": "entry",
-                "topic": "ZK Proofs Basics",
-                "tags": "zk,cryptography",
-                "status": "active",
-            },
-        },
-        {
-            "id": "doc-002",
-            "content": "Nullifiers prevent double-spending in anonymous systems.",
-            "metadata": {
-                "type": "entry",
-                "topic": "Nullifiers",
-                "tags": "zk,privacy",
-                "status": "active",
-            },
-        },
-        {
-            "id": "summary-001",
-            "content": "Summary of zero-knowledge concepts and learnings.",
-            "metadata": {
-                "type": "summary",
-                "topic": "ZK Summary",
-                "tags": "zk,summary",
-                "status": "reference",
-            },
-        },
-    ]
+    # Deep copy: tests may edit documents, and SAMPLE_DOCUMENTS also seeds
+    # the session-wide prebuilt DB
+    return copy.deepcopy(SAMPLE_DOCUMENTS)
+
+
+@pytest.fixture(scope="session")
+def prebuilt_db_dir(tmp_path_factory, embedder):
+    """Directory holding a memory.db with SAMPLE_DOCUMENTS indexed, built once."""
+    db_dir = tmp_path_factory.mktemp("prebuilt")
+
+    async def build():
+        store = VectorStore(str(db_dir / "memory.db"), embedder=embedder)
+        try:
+            await store.index_documents(SAMPLE_DOCUMENTS)
+        finally:
+            await store.close()
+
+    asyncio.run(build())
+    return db_dir
+
+
+@pytest.fixture
+async def indexed_store(prebuilt_db_dir, tmp_path, embedder):
+    """VectorStore over a private copy of the prebuilt DB, for read-only tests."""
+    shutil.copytree(prebuilt_db_dir, tmp_path / "db")
+    store = VectorStore(str(tmp_path / "db" / "memory.db"), embedder=embedder)
+    yield store
+    await store.close()
 
 
 class TestVectorStoreInit:
     """Tests for VectorStore initialization."""
 
-    async def test_init_creates_store(self, tmp_path):
-        store = VectorStore(str(tmp_path / "memory.db"), embedder=mock_embedder())
+    async def test_init_creates_store(self, tmp_path, embedder):
+        store = VectorStore(str(tmp_path / "memory.db"), embedder=embedder)
         try:
             assert store is not None
             assert await store.count() == 0
         finally:
             await store.close()
 
-    async def test_init_persists(self, tmp_path, sample_documents):
+    async def test_init_persists(self, tmp_path, sample_documents, embedder):
         db_path = str(tmp_path / "memory.db")
 
-        store1 = VectorStore(db_path, embedder=mock_embedder())
+        store1 = VectorStore(db_path, embedder=embedder)
         await store1.index_documents(sample_documents)
         await store1.close()
 
-        store2 = VectorStore(db_path, embedder=mock_embedder())
+        store2 = VectorStore(db_path, embedder=embedder)
         try:
             assert await store2.count() == 3
         finally:
             await store2.close()
 
-    async def test_init_accepts_directory_path(self, tmp_path):
+    async def test_init_accepts_directory_path(self, tmp_path, embedder):
         """Legacy behavior: directory path → `<dir>/memory.db`."""
         dir_path = tmp_path / "legacy_dir"
         dir_path.mkdir()
-        store = VectorStore(str(dir_path), embedder=mock_embedder())
+        store = VectorStore(str(dir_path), embedder=embedder)
         try:
             assert await store.count() == 0
             # `count()` opens the SqliteStore connection, which creates
@@ -108,6 +150,78 @@ class TestIndexDocuments:
     async def test_index_empty_list(self, vector_store):
         assert await vector_store.index_documents([]) == 0
 
+    async def test_index_embeds_chunks_in_one_batch(self, tmp_path, sample_documents, embedder):
+        """Embedders with embed_many get one batch call, not one call per row."""
+        base = embedder
+        single_calls: list[str] = []
+        batches: list[list[str]] = []
+
+        async def embed(text: str):
+            single_calls.append(text)
+            return await base(text)
+
+        async def embed_many(texts: list[str]):
+            batches.append(list(texts))
+            return [await base(t) for t in texts]
+
+        embed.embed_many = embed_many
+
+        store = VectorStore(str(tmp_path / "memory.db"), embedder=embed)
+        try:
+            assert await store.index_documents(sample_documents) == 3
+            assert batches == [[d["content"] for d in sample_documents]]
+            assert single_calls == []
+            assert await store.count() == 3
+        finally:
+            await store.close()
+
+    async def test_index_embeds_in_bounded_batches(
+        self, tmp_path, sample_documents, embedder, monkeypatch
+    ):
+        """Large indexing runs are embedded INDEX_BATCH_SIZE rows at a time."""
+        monkeypatch.setattr(vectorstore, "INDEX_BATCH_SIZE", 2)
+        base = embedder
+        batches: list[list[str]] = []
+
+        async def embed(text: str):
+            return await base(text)
+
+        async def embed_many(texts: list[str]):
+            batches.append(list(texts))
+            return [await base(t) for t in texts]
+
+        embed.embed_many = embed_many
+
+        store = VectorStore(str(tmp_path / "memory.db"), embedder=embed)
+        try:
+            assert await store.index_documents(sample_documents) == 3
+            contents = [d["content"] for d in sample_documents]
+            assert batches == [contents[:2], contents[2:]]
+        finally:
+            await store.close()
+
+    async def test_index_embeds_chunks_concurrently_without_embed_many(
+        self, tmp_path, sample_documents, embedder
+    ):
+        """Plain embedders are called for every row before any call returns."""
+        base = embedder
+        started: list[str] = []
+        all_started = asyncio.Event()
+
+        async def embed(text: str):
+            started.append(text)
+            if len(started) == len(sample_documents):
+                all_started.set()
+            await asyncio.wait_for(all_started.wait(), timeout=1)
+            return await base(text)
+
+        store = VectorStore(str(tmp_path / "memory.db"), embedder=embed)
+        try:
+            assert await store.index_documents(sample_documents) == 3
+            assert started == [d["content"] for d in sample_documents]
+        finally:
+            await store.close()
+
     async def test_upsert_updates_existing(self, vector_store, sample_documents):
         await vector_store.index_documents(sample_documents)
 
@@ -129,20 +243,16 @@ class TestIndexDocuments:
 class TestQuery:
     """Tests for vector search."""
 
-    async def test_query_returns_results(self, vector_store, sample_documents):
-        await vector_store.index_documents(sample_documents)
-
-        results = await vector_store.query("zero-knowledge proofs", n_results=2)
+    async def test_query_returns_results(self, indexed_store):
+        results = await indexed_store.query("zero-knowledge proofs", n_results=2)
 
         assert len(results) == 2
         assert all("id" in r for r in results)
         assert all("content" in r for r in results)
         assert all("distance" in r for r in results)
 
-    async def test_query_with_filter(self, vector_store, sample_documents):
-        await vector_store.index_documents(sample_documents)
-
-        results = await vector_store.query(
+    async def test_query_with_filter(self, indexed_store):
+        results = await indexed_store.query(
             "zero-knowledge",
             n_results=10,
             where={"type": "summary"},
@@ -151,26 +261,80 @@ class TestQuery:
         assert len(results) == 1
         assert results[0]["id"] == "summary-001"
 
-    async def test_query_respects_n_results(self, vector_store, sample_documents):
-        await vector_store.index_documents(sample_documents)
-
-        results = await vector_store.query("proof", n_results=1)
+    async def test_query_respects_n_results(self, indexed_store):
+        results = await indexed_store.query("proof", n_results=1)
 
         assert len(results) == 1
 
     async def test_query_empty_store(self, vector_store):
         assert await vector_store.query("anything") == []
 
+    async def test_repeated_query_served_from_cache(self, indexed_store, monkeypatch):
+        retrieve = AsyncMock(wraps=indexed_store._retriever.retrieve)
+        monkeypatch.setattr(indexed_store._retriever, "retrieve", retrieve)
 
-class TestGetSummaries:
-    """Tests for get_summaries method."""
+        first = await indexed_store.query("zero-knowledge proofs", n_results=2)
+        second = await indexed_store.query("zero-knowledge proofs", n_results=2)
+        await indexed_store.query("zero-knowledge proofs", n_results=1)
 
-    async def test_get_summaries_returns_only_summaries(
-        self, vector_store, sample_documents
+        assert second == first
+        assert retrieve.await_count == 2  # n_results is part of the key
+
+    async def test_repeated_query_text_embedded_once(
+        self, tmp_path, sample_documents, embedder
     ):
+        """A repeated query text reuses its embedding, even across writes."""
+        queries: list[str] = []
+
+        async def embed(text: str):
+            if text == "nullifiers":
+                queries.append(text)
+            return await embedder(text)
+
+        store = VectorStore(str(tmp_path / "memory.db"), embedder=embed)
+        try:
+            await store.index_documents(sample_documents)
+            await store.query("nullifiers", n_results=3)
+            await store.delete("doc-002")
+            results = await store.query("nullifiers", n_results=3)
+
+            assert queries == ["nullifiers"]
+            assert "doc-002" not in [r["id"] for r in results]
+        finally:
+            await store.close()
+
+    async def test_writes_invalidate_query_cache(self, vector_store, sample_documents):
         await vector_store.index_documents(sample_documents)
+        await vector_store.query("nullifiers", n_results=3)
 
-        summaries = await vector_store.get_summaries()
+        await vector_store.delete("doc-002")
+
+        results = await vector_store.query("nullifiers", n_results=3)
+        assert "doc-002" not in [r["id"] for r in results]
+
+    async def test_write_during_query_not_cached(self, indexed_store, monkeypatch):
+        """Results retrieved before a concurrent write must not be cached."""
+        retrieve = indexed_store._retriever.retrieve
+
+        async def retrieve_then_write(*args, **kwargs):
+            hits = await retrieve(*args, **kwargs)
+            await indexed_store.delete("doc-002")
+            return hits
+
+        monkeypatch.setattr(indexed_store._retriever, "retrieve", retrieve_then_write)
+        stale = await indexed_store.query("nullifiers", n_results=3)
+        monkeypatch.setattr(indexed_store._retriever, "retrieve", retrieve)
+
+        results = await indexed_store.query("nullifiers", n_results=3)
+        assert "doc-002" in [r["id"] for r in stale]
+        assert "doc-002" not in [r["id"] for r in results]
+
+
+class TestGetSummaries:
+    """Tests for get_summaries method."""
+
+    async def test_get_summaries_returns_only_summaries(self, indexed_store):
+        summaries = await indexed_store.get_summaries()
 
         assert len(summaries) == 1
         assert summaries[0]["id"] == "summary-001"
@@ -223,28 +387,22 @@ class TestGetSummaries:
 class TestGetById:
     """Tests for get_by_id method."""
 
-    async def test_get_existing_document(self, vector_store, sample_documents):
-        await vector_store.index_documents(sample_documents)
-
-        doc = await vector_store.get_by_id("doc-001")
+    async def test_get_existing_document(self, indexed_store):
+        doc = await indexed_store.get_by_id("doc-001")
 
         assert doc is not None
         assert doc["id"] == "doc-001"
         assert "content" in doc
 
-    async def test_get_nonexistent_document(self, vector_store, sample_documents):
-        await vector_store.index_documents(sample_documents)
-
-        assert await vector_store.get_by_id("nonexistent") is None
+    async def test_get_nonexistent_document(self, indexed_store):
+        assert await indexed_store.get_by_id("nonexistent") is None
 
 
 class TestGetAll:
     """Tests for get_all method."""
 
-    async def test_get_all_documents(self, vector_store, sample_documents):
-        await vector_store.index_documents(sample_documents)
-
-        all_docs = await vector_store.get_all()
+    async def test_get_all_documents(self, indexed_store):
+        all_docs = await indexed_store.get_all()
 
         assert len(all_docs) == 3
 
@@ -2,11 +2,13 @@
 Tests for the writer module.
 """
 
+import os
 import pytest
-import tempfile
+import shutil
 from pathlib import Path
-from ruamel.yaml import YAML
+import yaml
 
+import writer
 from writer import (
     validate_proposal,
     find_summary_file,
@@ -15,8 +17,9 @@ from writer import (
 )
 
 
-yaml = YAML()
-yaml.preserve_quotes = True
+# Verification only reads files back, so use libyaml when it's available;
+# writer.py itself keeps ruamel for comment-preserving writes
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
 
 SAMPLE_SUMMARY = """
@@ -46,17 +49,22 @@ links:
 """
 
 
+@pytest.fixture(scope="session")
+def content_template_dir(tmp_path_factory):
+    """Content directory with the sample summary, built once per session."""
+    root = tmp_path_factory.mktemp("content")
+    summaries_dir = root / "summaries"
+    summaries_dir.mkdir()
+    (summaries_dir / "test-summary.yaml").write_text(SAMPLE_SUMMARY)
+    return root
+
+
 @pytest.fixture
-def temp_content_dir():
-    """Create a temporary content directory with sample summary."""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        summaries_dir = Path(tmpdir) / "summaries"
-        summaries_dir.mkdir()
-        
-        summary_file = summaries_dir / "test-summary.yaml"
-        summary_file.write_text(SAMPLE_SUMMARY)
-        
-        yield tmpdir
+def temp_content_dir(tmp_path, content_template_dir):
+    """Fresh copy of the template content directory (tests modify it)."""
+    content_dir = tmp_path / "content"
+    shutil.copytree(content_template_dir, content_dir)
+    return str(content_dir)
 
 
 class TestValidateProposal:
@@ -222,6 +230,110 @@ class TestFindSummaryFile:
         file_path = find_summary_file("nonexistent", temp_content_dir)
         
         assert file_path is None
+    
+    def test_repeated_lookup_skips_reread(self, temp_content_dir, monkeypatch):
+        """Should not re-read unchanged files for a repeated lookup."""
+        find_summary_file("test-summary", temp_content_dir)
+        monkeypatch.setattr(writer, "_read_document_id", lambda f: pytest.fail(f"re-read {f}"))
+        
+        assert find_summary_file("test-summary", temp_content_dir).name == "test-summary.yaml"
+    
+    def test_reads_id_from_header_only(self, temp_content_dir):
+        """Should match on the leading block without parsing the body."""
+        summary_file = Path(temp_content_dir) / "summaries" / "big-summary.yaml"
+        summary_file.write_text('id: "big-summary"\ntype: "summary"\n\nbody: [not yaml\n')
+        
+        assert find_summary_file("big-summary", temp_content_dir) == summary_file
+    
+    def test_finds_unquoted_and_escaped_ids(self, temp_content_dir):
+        """Should let the YAML parser read ids the quoted-line fast path skips."""
+        summaries_dir = Path(temp_content_dir) / "summaries"
+        (summaries_dir / "plain.yaml").write_text("id: plain-id\n")
+        (summaries_dir / "escaped.yaml").write_text('id: "esc\\"aped"\n')
+        
+        assert find_summary_file("plain-id", temp_content_dir).name == "plain.yaml"
+        assert find_summary_file('esc"aped', temp_content_dir).name == "escaped.yaml"
+    
+    def test_finds_yaml_1_1_boolean_ids(self, temp_content_dir):
+        """Should read unquoted yes/no/on/off ids as strings, like the loader."""
+        (Path(temp_content_dir) / "summaries" / "on.yaml").write_text("id: on\ntype: summary\n")
+        
+        assert find_summary_file("on", temp_content_dir).name == "on.yaml"
+    
+    def test_finds_id_outside_header(self, temp_content_dir):
+        """Should fall back to a full parse when the id isn't in the header."""
+        summary_file = Path(temp_content_dir) / "summaries" / "late-id.yaml"
+        summary_file.write_text('type: "summary"\n\nid: "late-id"\n')
+        
+        assert find_summary_file("late-id", temp_content_dir) == summary_file
+    
+    def test_rescan_rereads_only_changed_files(self, temp_content_dir, monkeypatch):
+        """Should reuse ids of unchanged files when the directory changes."""
+        find_summary_file("test-summary", temp_content_dir)
+        new_file = Path(temp_content_dir) / "summaries" / "new-summary.yaml"
+        new_file.write_text('id: "new-summary"\n')
+        
+        read = []
+        original = writer._read_document_id
+        monkeypatch.setattr(writer, "_read_document_id", lambda f: read.append(f.name) or original(f))
+        
+        assert find_summary_file("new-summary", temp_content_dir) == new_file
+        assert read == ["new-summary.yaml"]
+    
+    def test_notices_same_mtime_edit_that_changes_size(self, temp_content_dir):
+        """Should re-read a file edited without its mtime changing."""
+        summary_file = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
+        assert find_summary_file("test-summary", temp_content_dir) == summary_file
+        
+        stat = summary_file.stat()
+        summary_file.write_text(summary_file.read_text().replace("test-summary", "moved", 1))
+        os.utime(summary_file, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        
+        assert find_summary_file("moved", temp_content_dir) == summary_file
+    
+    def test_document_id_cache_is_bounded(self, temp_content_dir, monkeypatch):
+        """Should forget the least recently read files past the cache size."""
+        monkeypatch.setattr(writer, "_DOCUMENT_ID_CACHE_SIZE", 2)
+        summaries_dir = Path(temp_content_dir) / "summaries"
+        for i in range(3):
+            (summaries_dir / f"extra-{i}.yaml").write_text(f'id: "extra-{i}"\n')
+        
+        assert find_summary_file("missing", temp_content_dir) is None
+        assert len(writer._document_ids) == 2
+    
+    def test_finds_summary_among_many_files(self, temp_content_dir):
+        """Should scan summaries before entries across many files."""
+        entries_dir = Path(temp_content_dir) / "entries"
+        entries_dir.mkdir()
+        for i in range(8):
+            (entries_dir / f"entry-{i}.yaml").write_text(f'id: "entry-{i}"\n')
+        # An entry file reusing a summary id loses to the summary itself
+        (entries_dir / "dupe.yaml").write_text('id: "test-summary"\n')
+        
+        assert find_summary_file("entry-5", temp_content_dir) == entries_dir / "entry-5.yaml"
+        assert find_summary_file("test-summary", temp_content_dir).parent.name == "summaries"
+    
+    def test_finds_summary_added_after_lookup(self, temp_content_dir):
+        """Should notice files added since a previous lookup."""
+        assert find_summary_file("new-summary", temp_content_dir) is None
+        
+        new_file = Path(temp_content_dir) / "summaries" / "new-summary.yaml"
+        new_file.write_text('id: "new-summary"\ntype: "summary"\n')
+        
+        assert find_summary_file("new-summary", temp_content_dir) == new_file
+    
+    def test_notices_id_edited_in_place(self, temp_content_dir):
+        """Should not serve a memoized lookup after a file's id is edited in place."""
+        summary_file = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
+        assert find_summary_file("test-summary", temp_content_dir) == summary_file
+        assert find_summary_file("renamed-summary", temp_content_dir) is None
+        
+        stat = summary_file.stat()
+        summary_file.write_text(summary_file.read_text().replace("test-summary", "renamed-summary", 1))
+        os.utime(summary_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        
+        assert find_summary_file("test-summary", temp_content_dir) is None
+        assert find_summary_file("renamed-summary", temp_content_dir) == summary_file
 
 
 class TestApplyUpdate:
@@ -245,7 +357,7 @@ class TestApplyUpdate:
         # Verify file was updated
         file_path = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
         with open(file_path) as f:
-            updated = yaml.load(f)
+            updated = yaml.load(f, Loader=Loader)
         
         assert len(updated["learnings"]) == 2
         assert updated["learnings"][1]["insight"] == "Brand new insight"
@@ -269,7 +381,7 @@ class TestApplyUpdate:
         # Verify file was updated
         file_path = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
         with open(file_path) as f:
-            updated = yaml.load(f)
+            updated = yaml.load(f, Loader=Loader)
         
         assert len(updated["decisions"]) == 2
         # Should have added date
@@ -289,7 +401,7 @@ class TestApplyUpdate:
         
         file_path = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
         with open(file_path) as f:
-            updated = yaml.load(f)
+            updated = yaml.load(f, Loader=Loader)
         
         assert "New question?" in updated["open_questions"]
     
@@ -309,11 +421,54 @@ class TestApplyUpdate:
         
         file_path = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
         with open(file_path) as f:
-            updated = yaml.load(f)
+            updated = yaml.load(f, Loader=Loader)
         
         link_ids = [l["id"] for l in updated["links"]]
         assert "new-link" in link_ids
     
+    def test_failed_write_keeps_original_file(self, temp_content_dir, monkeypatch):
+        """Should leave the summary untouched (and no temp file) if the dump fails."""
+        file_path = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
+        original = file_path.read_text()
+        
+        def failing_dump(data, stream):
+            stream.write("partial: [")
+            raise RuntimeError("disk full")
+        
+        monkeypatch.setattr(writer.yaml, "dump", failing_dump)
+        proposal = {
+            "target_summary_id": "test-summary",
+            "source_entry_id": "test-entry",
+            "new_open_questions": ["New question?"]
+        }
+        
+        result = apply_update(proposal, temp_content_dir)
+        
+        assert result["success"] is False
+        assert "disk full" in result["error"]
+        assert file_path.read_text() == original
+        assert list(file_path.parent.iterdir()) == [file_path]
+    
+    def test_symlinked_summary_updates_target(self, temp_content_dir):
+        """Should write through a symlinked summary, keeping the link."""
+        link = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
+        target = Path(temp_content_dir) / "shared" / "test-summary.yaml"
+        target.parent.mkdir()
+        link.rename(target)
+        link.symlink_to(target)
+        proposal = {
+            "target_summary_id": "test-summary",
+            "source_entry_id": "test-entry",
+            "new_open_questions": ["New question?"]
+        }
+        
+        result = apply_update(proposal, temp_content_dir)
+        
+        assert result["success"] is True
+        assert link.is_symlink()
+        assert "New question?" in target.read_text()
+        assert sorted(p.name for p in target.parent.iterdir()) == ["test-summary.yaml"]
+    
     def test_skip_duplicate_learning(self, temp_content_dir):
         """Should not add duplicate learning."""
         proposal = {
@@ -331,7 +486,7 @@ class TestApplyUpdate:
         
         file_path = Path(temp_content_dir) / "summaries" / "test-summary.yaml"
         with open(file_path) as f:
-            updated = yaml.load(f)
+            updated = yaml.load(f, Loader=Loader)
         
         # Still only one learning
         assert len(updated["learnings"]) == 1
@@ -364,6 +519,23 @@ class TestApplyUpdate:
         assert result["success"] is True
         assert len(result["changes"]) == 0
     
+    def test_skip_duplicates_within_proposal(self, temp_content_dir):
+        """Should add an item repeated within one proposal only once."""
+        proposal = {
+            "target_summary_id": "test-summary",
+            "source_entry_id": "test-entry",
+            "new_open_questions": ["New question?", "New question?"],
+            "new_links": [
+                {"id": "new-link", "relationship": "informs"},
+                {"id": "new-link", "relationship": "depends_on"},
+            ]
+        }
+        
+        result = apply_update(proposal, temp_content_dir)
+        
+        assert result["success"] is True
+        assert len(result["changes"]) == 2
+    
     def test_apply_to_nonexistent_summary(self, temp_content_dir):
         """Should fail for non-existent summary."""
         proposal = {
@@ -415,3 +587,15 @@ class TestPreviewUpdate:
         preview = preview_update(proposal, temp_content_dir)
         
         assert preview["valid"] is False
+    
+    def test_preview_summary_with_boolean_like_id(self, temp_content_dir):
+        """Should find and read a summary whose unquoted id is a YAML 1.1 bool."""
+        (Path(temp_content_dir) / "summaries" / "off.yaml").write_text(
+            "id: off\ntype: summary\nlearnings:\n  - insight: Noted\n"
+        )
+        proposal = {"target_summary_id": "off", "source_entry_id": "test-entry"}
+        
+        preview = preview_update(proposal, temp_content_dir)
+        
+        assert preview["valid"] is True
+        assert preview["current_learnings_count"] == 1
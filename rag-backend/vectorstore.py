@@ -20,16 +20,70 @@ Two quirks worth knowing:
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+from collections import OrderedDict, deque
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
+import numpy as np
 from jig.memory.local import DenseRetriever, SqliteStore
 
-from embedders import Embedder, select_embedder
+from embedders import Embedder, disk_cached_embedder, select_embedder
 
 logger = logging.getLogger(__name__)
 
+# Semantic query cache: a query whose embedding is at least this
+# cosine-similar to a cached one (same n_results/filter) reuses its results
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_MIN_SIMILARITY = 0.97
+
+# Per-row bookkeeping added by index_documents; stripped on reconstruction
+_CHUNK_META_KEYS = ("chunk_index", "parent_id", "entry_id")
+
+# Chunk rows embedded (and held in memory) at a time by index_documents
+INDEX_BATCH_SIZE = 256
+
+
+class _PrimedEmbedder:
+    """Embedder wrapper that can embed a batch of texts ahead of time.
+
+    `SqliteStore.add` embeds one text per call. `index_documents` knows
+    every chunk up front, so it primes this wrapper once through the
+    wrapped embedder's `embed_many` (or, without one, concurrent single
+    calls); each add then takes its vector from the primed set instead
+    of embedding again.
+    """
+
+    def __init__(self, embed: Embedder):
+        self._embed = embed
+        self._primed: dict[str, np.ndarray] = {}
+
+    async def prime(self, texts: list[str]) -> None:
+        pending = [t for t in dict.fromkeys(texts) if t not in self._primed]
+        if not pending:
+            return
+        embed_many = getattr(self._embed, "embed_many", None)
+        if embed_many is not None:
+            vecs = await embed_many(pending)
+        else:
+            vecs = await asyncio.gather(*(self._embed(t) for t in pending))
+        self._primed.update(zip(pending, vecs))
+
+    def put(self, text: str, vec: np.ndarray) -> None:
+        self._primed[text] = vec
+
+    def discard(self, text: str) -> None:
+        self._primed.pop(text, None)
+
+    def clear(self) -> None:
+        self._primed.clear()
+
+    async def __call__(self, text: str) -> np.ndarray:
+        vec = self._primed.pop(text, None)
+        return vec if vec is not None else await self._embed(text)
+
 
 class VectorStore:
     """Document store with similarity search and metadata filtering.
@@ -52,16 +106,38 @@ class VectorStore:
                 created.
             embedder: Optional `Embedder`. Defaults to `select_embedder()`
                 which honors the legacy `USE_MOCK_EMBEDDINGS`,
-                `USE_LOCAL_EMBEDDINGS`, `OPENAI_API_KEY` env vars.
+                `USE_LOCAL_EMBEDDINGS`, `OPENAI_API_KEY` env vars. Model-
+                backed defaults are wrapped in a persistent embedding cache
+                (`embedding_cache.db` next to the store).
         """
         db_path = self._resolve_db_path(persist_dir)
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
 
+        if embedder is None:
+            embedder = select_embedder()
+            model_name = getattr(embedder, "model_name", None)
+            if model_name:
+                embedder = disk_cached_embedder(
+                    embedder,
+                    str(Path(db_path).with_name("embedding_cache.db")),
+                    model_name,
+                )
+        self._base_embedder = embedder
+        self._embedder = _PrimedEmbedder(embedder)
         self._store = SqliteStore(
             db_path=db_path,
-            embedder=embedder or select_embedder(),
+            embedder=self._embedder,
         )
         self._retriever = DenseRetriever(self._store)
+        # (unit query embedding, (n_results, where), results); cleared on writes
+        self._query_cache: deque[tuple[np.ndarray, tuple, list[dict]]] = deque(
+            maxlen=QUERY_CACHE_SIZE
+        )
+        # Bumped on every invalidation; a query only caches its results if
+        # no write started or finished while it was retrieving
+        self._write_generation = 0
+        # query text -> embedding (LRU); independent of store contents
+        self._query_vectors: OrderedDict[str, np.ndarray] = OrderedDict()
         logger.info(f"Initialized SqliteStore at {db_path}")
 
     @staticmethod
@@ -77,11 +153,14 @@ class VectorStore:
         return str(p / "memory.db")
 
     async def close(self) -> None:
-        """Release the underlying sqlite connection. Call on shutdown."""
+        """Release the underlying sqlite connections. Call on shutdown."""
         await self._store.close()
+        close_cache = getattr(self._base_embedder, "close", None)
+        if close_cache is not None:
+            close_cache()
 
     # ------------------------------------------------------------------
-    # Chunking (ported verbatim from the ChromaDB implementation)
+    # Chunking (same output as the ChromaDB implementation)
     # ------------------------------------------------------------------
 
     @staticmethod
@@ -98,31 +177,43 @@ class VectorStore:
 
         chunks: list[str] = []
         paragraphs = text.split("\n\n")
-        current_chunk = ""
+        # The chunk being built, as parts joined once when it is flushed
+        current_parts: list[str] = []
+        current_len = 0
+
+        def flush() -> bool:
+            chunk = "".join(current_parts).strip()
+            if chunk:
+                chunks.append(chunk)
+            return bool(chunk)
 
         for para in paragraphs:
             # If a single paragraph exceeds max_chars, split it further
             if len(para) > max_chars:
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                    current_chunk = ""
+                if flush():
+                    current_parts, current_len = [], 0
                 sentences = para.replace(". ", ".\n").split("\n")
                 for sentence in sentences:
-                    if len(current_chunk) + len(sentence) + 1 > max_chars:
-                        if current_chunk.strip():
-                            chunks.append(current_chunk.strip())
-                        current_chunk = sentence
+                    if current_len + len(sentence) + 1 > max_chars:
+                        flush()
+                        current_parts, current_len = [sentence], len(sentence)
                     else:
-                        current_chunk += (" " if current_chunk else "") + sentence
-            elif len(current_chunk) + len(para) + 2 > max_chars:
-                if current_chunk.strip():
-                    chunks.append(current_chunk.strip())
-                current_chunk = para
+                        if current_len:
+                            current_parts.append(" ")
+                            current_len += 1
+                        current_parts.append(sentence)
+                        current_len += len(sentence)
+            elif current_len + len(para) + 2 > max_chars:
+                flush()
+                current_parts, current_len = [para], len(para)
             else:
-                current_chunk += ("\n\n" if current_chunk else "") + para
+                if current_len:
+                    current_parts.append("\n\n")
+                    current_len += 2
+                current_parts.append(para)
+                current_len += len(para)
 
-        if current_chunk.strip():
-            chunks.append(current_chunk.strip())
+        flush()
 
         return chunks if chunks else [text]
 
@@ -147,12 +238,12 @@ class VectorStore:
 
         reconstructed: list[dict] = []
         for parent, rows in grouped.items():
-            rows.sort(key=lambda e: e.metadata.get("chunk_index", 0))
-            base_meta = {
-                k: v
-                for k, v in rows[0].metadata.items()
-                if k not in ("chunk_index", "parent_id", "entry_id")
-            }
+            # Most documents are a single chunk; only multi-chunk ones need ordering
+            if len(rows) > 1:
+                rows.sort(key=lambda e: e.metadata.get("chunk_index", 0))
+            base_meta = dict(rows[0].metadata)
+            for key in _CHUNK_META_KEYS:
+                base_meta.pop(key, None)
             doc: dict[str, Any] = {
                 "id": parent,
                 "content": "\n\n".join(r.content for r in rows),
@@ -179,9 +270,17 @@ class VectorStore:
         Single-document helper used by `delete()`. `index_documents`
         uses a bulk path that scans once for N documents instead.
         """
-        for row in await self._store.all():
-            if row.metadata.get("entry_id") == entry_id:
-                await self._store.delete(row.id)
+        self._invalidate_query_cache()
+        try:
+            for row in await self._store.all():
+                if row.metadata.get("entry_id") == entry_id:
+                    await self._store.delete(row.id)
+        finally:
+            self._invalidate_query_cache()
+
+    def _invalidate_query_cache(self) -> None:
+        self._query_cache.clear()
+        self._write_generation += 1
 
     async def index_documents(self, documents: list[dict]) -> int:
         """
@@ -194,17 +293,42 @@ class VectorStore:
         row whose `entry_id` is in the incoming document set. This keeps
         bulk reindex at O(total_rows) instead of O(total_rows × documents).
 
+        Documents are chunked as they are consumed and rows are embedded
+        and added `INDEX_BATCH_SIZE` at a time, in one batch call when the
+        embedder supports it (see `embedders`) rather than one call per
+        row, so a bulk reindex holds at most one batch of chunk rows and
+        vectors in memory.
+
         Returns the total number of chunk rows written.
         """
         if not documents:
             return 0
 
+        self._invalidate_query_cache()
         incoming_ids = {doc["id"] for doc in documents}
-        for row in await self._store.all():
-            if row.metadata.get("entry_id") in incoming_ids:
-                await self._store.delete(row.id)
-
-        total_chunks = 0
+        total = 0
+        batch: list[tuple[str, dict]] = []
+        try:
+            for row in await self._store.all():
+                if row.metadata.get("entry_id") in incoming_ids:
+                    await self._store.delete(row.id)
+
+            for row in self._chunk_rows(documents):
+                batch.append(row)
+                if len(batch) >= INDEX_BATCH_SIZE:
+                    total += await self._add_rows(batch)
+                    batch = []
+            if batch:
+                total += await self._add_rows(batch)
+        finally:
+            self._embedder.clear()
+            self._invalidate_query_cache()
+
+        logger.info(f"Indexed {len(documents)} documents ({total} chunks)")
+        return total
+
+    def _chunk_rows(self, documents: list[dict]) -> Iterator[tuple[str, dict]]:
+        """Yield `(chunk, metadata)` rows for documents, one document at a time."""
         for doc in documents:
             entry_id = doc["id"]
             chunks = self._chunk_text(doc["content"])
@@ -218,11 +342,14 @@ class VectorStore:
                     "chunk_index": i,
                     "parent_id": entry_id,
                 }
-                await self._store.add(chunk, meta)
-                total_chunks += 1
+                yield chunk, meta
 
-        logger.info(f"Indexed {len(documents)} documents ({total_chunks} chunks)")
-        return total_chunks
+    async def _add_rows(self, rows: list[tuple[str, dict]]) -> int:
+        """Embed one batch of rows together, then add them to the store."""
+        await self._embedder.prime([chunk for chunk, _ in rows])
+        for chunk, meta in rows:
+            await self._store.add(chunk, meta)
+        return len(rows)
 
     # ------------------------------------------------------------------
     # Query / read
@@ -240,15 +367,57 @@ class VectorStore:
         `where` is an equality metadata filter (e.g. `{"type": "summary"}`),
         plumbed through jig's `context={"filter": ...}`. We over-fetch to
         let chunk deduplication shrink the result back to `n_results`.
+
+        Near-duplicate queries (see `QUERY_CACHE_MIN_SIMILARITY`) are served
+        from an in-memory cache that every write clears. Embeddings of the
+        last `QUERY_CACHE_SIZE` distinct query texts are kept across writes.
         """
+        key = (n_results, json.dumps(where, sort_keys=True) if where else None)
+        query_vec = await self._embed_query(query_text)
+        norm = float(np.linalg.norm(query_vec))
+        unit = query_vec / norm if norm else query_vec
+
+        cached = self._cached_query(unit, key)
+        if cached is not None:
+            return [{**doc, "metadata": dict(doc["metadata"])} for doc in cached]
+
         context = {"filter": where} if where else None
-        hits = await self._retriever.retrieve(
-            query_text, k=n_results * 3, context=context
-        )
-        if not hits:
-            return []
-        reconstructed = self._reconstruct_from_entries(hits)
-        return reconstructed[:n_results]
+        generation = self._write_generation
+        # Hand the retriever the embedding we already have
+        self._embedder.put(query_text, query_vec)
+        try:
+            hits = await self._retriever.retrieve(
+                query_text, k=n_results * 3, context=context
+            )
+        finally:
+            self._embedder.discard(query_text)
+
+        results = self._reconstruct_from_entries(hits)[:n_results] if hits else []
+        if norm and generation == self._write_generation:
+            self._query_cache.append((unit, key, results))
+        return [{**doc, "metadata": dict(doc["metadata"])} for doc in results]
+
+    async def _embed_query(self, query_text: str) -> np.ndarray:
+        query_vec = self._query_vectors.get(query_text)
+        if query_vec is None:
+            query_vec = await self._embedder(query_text)
+            self._query_vectors[query_text] = query_vec
+            if len(self._query_vectors) > QUERY_CACHE_SIZE:
+                self._query_vectors.popitem(last=False)
+        else:
+            self._query_vectors.move_to_end(query_text)
+        return query_vec
+
+    def _cached_query(self, unit: np.ndarray, key: tuple) -> Optional[list[dict]]:
+        """Results of the most similar cached query with the same key, if close enough."""
+        matches = [(vec, results) for vec, k, results in self._query_cache if k == key]
+        if not matches:
+            return None
+        sims = np.stack([vec for vec, _ in matches]) @ unit
+        best = int(np.argmax(sims))
+        if sims[best] >= QUERY_CACHE_MIN_SIMILARITY:
+            return matches[best][1]
+        return None
 
     async def get_summaries(self) -> list[dict]:
         """Return all `type=="summary"` documents, chunks reconstructed."""
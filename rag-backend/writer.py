@@ -6,16 +6,48 @@ Apply approved updates to YAML files while preserving formatting.
 
 from ruamel.yaml import YAML
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 import logging
+import os
+import re
+import shutil
+from collections import OrderedDict
 from datetime import date
 
+from yaml import YAMLError
+
+from loader import parse_yaml
+
 logger = logging.getLogger(__name__)
 
 yaml = YAML()
 yaml.preserve_quotes = True
 yaml.indent(mapping=2, sequence=4, offset=2)
 
+_PROPOSAL_REQUIRED_FIELDS = ("target_summary_id", "source_entry_id")
+# Proposal list fields: (field, item type, required key of dict items)
+_PROPOSAL_LIST_FIELDS = (
+    ("new_learnings", dict, "insight"),
+    ("new_decisions", dict, "decision"),
+    ("new_open_questions", str, None),
+    ("new_links", dict, "id"),
+)
+_TYPE_NAMES = {dict: "a dict", str: "a string"}
+
+# Top-level `id: "..."` / `id: '...'` line with no escapes. Anything else
+# (unquoted, escaped) is left to the YAML parser to interpret.
+_QUOTED_ID_RE = re.compile(r"""^id:[ \t]*(?:"([^"\\]*)"|'([^']*)')[ \t]*(?:#.*)?$""")
+
+# apply_update writes whole summaries at once; fewer, larger write() calls
+_WRITE_BUFFER_SIZE = 64 * 1024
+
+# Max files whose ids find_summary_file remembers
+_DOCUMENT_ID_CACHE_SIZE = 4096
+
+# path -> ((mtime_ns, size), document id) for files find_summary_file has
+# read, least recently used first
+_document_ids: OrderedDict[Path, tuple[tuple[int, int], Any]] = OrderedDict()
+
 
 def validate_proposal(proposal: dict) -> tuple[bool, Optional[str]]:
     """
@@ -27,60 +59,30 @@ def validate_proposal(proposal: dict) -> tuple[bool, Optional[str]]:
     Returns:
         Tuple of (is_valid, error_message)
     """
-    if not proposal.get("target_summary_id"):
-        return False, "Missing target_summary_id"
-        
-    if not proposal.get("source_entry_id"):
-        return False, "Missing source_entry_id"
+    for field in _PROPOSAL_REQUIRED_FIELDS:
+        if not proposal.get(field):
+            return False, f"Missing {field}"
     
-    # Validate new_learnings structure
-    new_learnings = proposal.get("new_learnings")
-    if new_learnings is not None:
-        if not isinstance(new_learnings, list):
-            return False, "new_learnings is not a list"
-        for i, learning in enumerate(new_learnings):
-            if not isinstance(learning, dict):
-                return False, f"new_learnings[{i}] is not a dict"
-            if "insight" not in learning:
-                return False, f"new_learnings[{i}] missing 'insight' field"
-            # Validate relevance field if present
-            if "relevance" in learning:
-                if not isinstance(learning["relevance"], list):
-                    return False, f"new_learnings[{i}] 'relevance' must be a list"
-                for j, rel in enumerate(learning["relevance"]):
-                    if not isinstance(rel, str):
-                        return False, f"new_learnings[{i}]['relevance'][{j}] must be a string"
-    
-    # Validate new_decisions structure
-    new_decisions = proposal.get("new_decisions")
-    if new_decisions is not None:
-        if not isinstance(new_decisions, list):
-            return False, "new_decisions is not a list"
-        for i, decision in enumerate(new_decisions):
-            if not isinstance(decision, dict):
-                return False, f"new_decisions[{i}] is not a dict"
-            if "decision" not in decision:
-                return False, f"new_decisions[{i}] missing 'decision' field"
-    
-    # Validate new_open_questions structure
-    new_questions = proposal.get("new_open_questions")
-    if new_questions is not None:
-        if not isinstance(new_questions, list):
-            return False, "new_open_questions is not a list"
-        for i, question in enumerate(new_questions):
-            if not isinstance(question, str):
-                return False, f"new_open_questions[{i}] is not a string"
-    
-    # Validate new_links structure
-    new_links = proposal.get("new_links")
-    if new_links is not None:
-        if not isinstance(new_links, list):
-            return False, "new_links is not a list"
-        for i, link in enumerate(new_links):
-            if not isinstance(link, dict):
-                return False, f"new_links[{i}] is not a dict"
-            if "id" not in link:
-                return False, f"new_links[{i}] missing 'id' field"
+    for field, item_type, required_key in _PROPOSAL_LIST_FIELDS:
+        items = proposal.get(field)
+        if items is None:
+            continue
+        if not isinstance(items, list):
+            return False, f"{field} is not a list"
+        for i, item in enumerate(items):
+            if not isinstance(item, item_type):
+                return False, f"{field}[{i}] is not {_TYPE_NAMES[item_type]}"
+            if required_key is not None and required_key not in item:
+                return False, f"{field}[{i}] missing '{required_key}' field"
+
+    # Validate relevance field of new learnings if present
+    for i, learning in enumerate(proposal.get("new_learnings") or []):
+        if "relevance" in learning:
+            if not isinstance(learning["relevance"], list):
+                return False, f"new_learnings[{i}] 'relevance' must be a list"
+            for j, rel in enumerate(learning["relevance"]):
+                if not isinstance(rel, str):
+                    return False, f"new_learnings[{i}]['relevance'][{j}] must be a string"
     
     return True, None
 
@@ -89,6 +91,9 @@ def find_summary_file(summary_id: str, content_dir: str) -> Optional[Path]:
     """
     Find the YAML file for a summary by ID.
     
+    Each file's id is remembered until its mtime or size changes, so a
+    lookup over unchanged files costs a stat per file.
+    
     Args:
         summary_id: Summary document ID
         content_dir: Content directory path
@@ -98,31 +103,79 @@ def find_summary_file(summary_id: str, content_dir: str) -> Optional[Path]:
     """
     content_path = Path(content_dir)
     
-    # Check summaries directory first
-    summaries_dir = content_path / "summaries"
-    if summaries_dir.exists():
-        for file in summaries_dir.glob("*.yaml"):
-            try:
-                with open(file) as f:
-                    content = yaml.load(f)
-                    if content and content.get("id") == summary_id:
-                        return file
-            except Exception as e:
-                logger.warning(f"Error reading {file}: {e}")
+    # Check summaries directory first, then entries (in case type is wrong
+    # in metadata)
+    for subdir in ("summaries", "entries"):
+        if not (content_path / subdir).exists():
+            continue
+        for file in (content_path / subdir).glob("*.yaml"):
+            if _document_id_or_log(file) == summary_id:
+                return file
+    return None
+
+
+def _document_id_or_log(file: Path) -> Any:
+    """_cached_document_id, logging failures instead of raising."""
+    try:
+        return _cached_document_id(file)
+    except Exception as e:
+        logger.warning(f"Error reading {file}: {e}")
+        return None
+
+
+def _read_header_lines(file: Path) -> list[str]:
+    """
+    Lines of the leading block of a YAML file, up to its first blank line.
+    
+    Content files put id/type/topic first, so the header is enough to
+    identify a document without reading its (possibly long) body.
+    """
+    lines = []
+    with open(file) as f:
+        for line in f:
+            if not line.strip():
+                if lines:
+                    break
+                continue
+            lines.append(line)
+    return lines
+
+
+def _cached_document_id(file: Path) -> Any:
+    """Document id of a YAML file, re-read only when its mtime or size changes."""
+    stat = file.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _document_ids.get(file)
+    if cached is not None and cached[0] == version:
+        _document_ids.move_to_end(file)
+        return cached[1]
+    doc_id = _read_document_id(file)
+    _document_ids[file] = (version, doc_id)
+    _document_ids.move_to_end(file)
+    while len(_document_ids) > _DOCUMENT_ID_CACHE_SIZE:
+        _document_ids.popitem(last=False)
+    return doc_id
+
+
+def _read_document_id(file: Path) -> Any:
+    """Document id of a YAML file, from its header when possible."""
+    lines = _read_header_lines(file)
+    for line in lines:
+        match = _QUOTED_ID_RE.match(line)
+        if match:
+            return match.group(1) if match.group(1) is not None else match.group(2)
     
-    # Also check entries directory (in case type is wrong in metadata)
-    entries_dir = content_path / "entries"
-    if entries_dir.exists():
-        for file in entries_dir.glob("*.yaml"):
-            try:
-                with open(file) as f:
-                    content = yaml.load(f)
-                    if content and content.get("id") == summary_id:
-                        return file
-            except Exception as e:
-                logger.warning(f"Error reading {file}: {e}")
+    try:
+        header = parse_yaml("".join(lines))
+    except YAMLError:
+        header = None
+    if isinstance(header, dict) and isinstance(header.get("id"), str):
+        return header["id"]
     
-    return None
+    # id not in the header (or not a plain string there): parse it all
+    with open(file) as f:
+        content = parse_yaml(f)
+    return content.get("id") if content else None
 
 
 def apply_update(proposal: dict, content_dir: str) -> dict:
@@ -162,9 +215,9 @@ def apply_update(proposal: dict, content_dir: str) -> dict:
         if "learnings" not in summary:
             summary["learnings"] = []
         
+        # Check for duplicates (by insight text)
+        existing_insights = {l.get("insight", "") for l in summary["learnings"]}
         for learning in proposal["new_learnings"]:
-            # Check for duplicates (by insight text)
-            existing_insights = [l.get("insight", "") for l in summary["learnings"]]
             if learning["insight"] not in existing_insights:
                 # Ensure relevance includes source entry
                 if "relevance" not in learning:
@@ -173,6 +226,7 @@ def apply_update(proposal: dict, content_dir: str) -> dict:
                     learning["relevance"].append(proposal["source_entry_id"])
                     
                 summary["learnings"].append(learning)
+                existing_insights.add(learning["insight"])
                 changes_made.append(f"Added learning: {learning['insight'][:50]}...")
     
     # Apply new_decisions
@@ -180,15 +234,17 @@ def apply_update(proposal: dict, content_dir: str) -> dict:
         if "decisions" not in summary:
             summary["decisions"] = []
         
+        # Check for duplicates
+        existing_decisions = {d.get("decision", "") for d in summary["decisions"]}
+        today = str(date.today())
         for decision in proposal["new_decisions"]:
-            # Check for duplicates
-            existing_decisions = [d.get("decision", "") for d in summary["decisions"]]
             if decision["decision"] not in existing_decisions:
                 # Add date if not present
                 if "date" not in decision:
-                    decision["date"] = str(date.today())
+                    decision["date"] = today
                     
                 summary["decisions"].append(decision)
+                existing_decisions.add(decision["decision"])
                 changes_made.append(f"Added decision: {decision['decision'][:50]}...")
     
     # Apply new_open_questions
@@ -196,9 +252,11 @@ def apply_update(proposal: dict, content_dir: str) -> dict:
         if "open_questions" not in summary:
             summary["open_questions"] = []
         
+        existing_questions = set(summary["open_questions"])
         for question in proposal["new_open_questions"]:
-            if question not in summary["open_questions"]:
+            if question not in existing_questions:
                 summary["open_questions"].append(question)
+                existing_questions.add(question)
                 changes_made.append(f"Added question: {question[:50]}...")
     
     # Apply new_links
@@ -206,10 +264,11 @@ def apply_update(proposal: dict, content_dir: str) -> dict:
         if "links" not in summary:
             summary["links"] = []
         
-        existing_link_ids = [l.get("id") for l in summary["links"]]
+        existing_link_ids = {l.get("id") for l in summary["links"]}
         for link in proposal["new_links"]:
             if link["id"] not in existing_link_ids:
                 summary["links"].append(link)
+                existing_link_ids.add(link["id"])
                 changes_made.append(f"Added link: {link['id']}")
     
     if not changes_made:
@@ -221,11 +280,19 @@ def apply_update(proposal: dict, content_dir: str) -> dict:
             "message": "No new changes to apply (all proposed updates already exist)"
         }
     
-    # Write back
+    # Write back via a sibling temp file so a failed dump never leaves a
+    # truncated summary behind. Resolved first so a symlinked summary has
+    # its target replaced rather than the link turned into a regular file.
+    file_path = file_path.resolve()
+    tmp_path = file_path.with_name(file_path.name + ".tmp")
     try:
-        with open(file_path, "w") as f:
+        with open(tmp_path, "w", buffering=_WRITE_BUFFER_SIZE) as f:
             yaml.dump(summary, f)
+        shutil.copymode(file_path, tmp_path)
+        _copy_owner(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
     except Exception as e:
+        tmp_path.unlink(missing_ok=True)
         return {"success": False, "error": f"Failed to write file: {e}"}
     
     logger.info(f"Applied {len(changes_made)} changes to {file_path}")
@@ -238,6 +305,15 @@ def apply_update(proposal: dict, content_dir: str) -> dict:
     }
 
 
+def _copy_owner(src: Path, dst: Path) -> None:
+    """Give dst src's owner and group, where the process is allowed to."""
+    st = src.stat()
+    try:
+        os.chown(dst, st.st_uid, st.st_gid)
+    except (AttributeError, PermissionError):  # no chown on Windows
+        pass
+
+
 def preview_update(proposal: dict, content_dir: str) -> dict:
     """
     Preview what changes would be made without applying them.
@@ -260,7 +336,7 @@ def preview_update(proposal: dict, content_dir: str) -> dict:
         return {"valid": False, "error": f"Summary file not found: {summary_id}"}
     
     with open(file_path) as f:
-        summary = yaml.load(f)
+        summary = parse_yaml(f)
     
     preview = {
         "valid": True,